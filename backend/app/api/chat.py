@@ -1,37 +1,137 @@
+import json
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.services.rag_service import RAGService
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator
+from app.core.concurrency import ConcurrencyLimiter
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, get_async_db
+from app.core.tracing import span
+from app.services.chat_sessions import ChatSession, chat_sessions
+from app.services.rag_service import RAGService, response_cache
 from app.schemas.chat import ChatRequest, ChatResponse
 from app.schemas.product import ProductResponse
 
+settings = get_settings()
+
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+chat_limiter = ConcurrencyLimiter(
+    max_concurrent=settings.chat_max_concurrency,
+    max_queue=settings.chat_max_queue,
+    queue_timeout=settings.chat_queue_timeout_seconds
+)
+
+
+SESSION_EXPIRED = "Chat session expired; resend without session_id and with conversation_history"
+
+
+def get_history(request: ChatRequest):
+    return [
+        {"role": msg.role, "content": msg.content}
+        for msg in (request.conversation_history or [])
+    ]
+
 
-@router.post("", response_model=ChatResponse)
-def chat(request: ChatRequest, db: Session = Depends(get_db)):
+def get_session(request: ChatRequest) -> ChatSession:
+    """The request's session, or a new one seeded from its conversation_history.
+
+    A session_id that is no longer live (expired, evicted or lost to a
+    restart) with no history to re-seed it is a 409, so the client resends
+    its transcript without the stale id instead of continuing blank.
+    """
+    history = get_history(request)
+    session = chat_sessions.get(request.session_id)
+    if session is not None:
+        return session
+    if request.session_id and not history:
+        raise HTTPException(status_code=409, detail=SESSION_EXPIRED)
+    return chat_sessions.create(history)
+
+
+@router.post("", response_model=ChatResponse, dependencies=[Depends(chat_limiter)])
+async def chat(request: ChatRequest, db: AsyncSession = Depends(get_async_db)):
+    session = get_session(request)
     try:
         rag_service = RAGService(db)
         
-        history = [
-            {"role": msg.role, "content": msg.content}
-            for msg in (request.conversation_history or [])
-        ]
-        
-        response_text, products, needs_clarification = rag_service.generate_response(
+        response_text, products, needs_clarification = await rag_service.generate_response(
             query=request.message,
-            conversation_history=history
+            session=session
         )
         
-        product_responses = [
-            ProductResponse.model_validate(p) for p in products
-        ]
-        
-        return ChatResponse(
-            message=response_text,
-            products=product_responses,
-            needs_clarification=needs_clarification
-        )
+        with span("serialize"):
+            return ChatResponse(
+                message=response_text,
+                products=[ProductResponse.model_validate(p) for p in products],
+                needs_clarification=needs_clarification,
+                session_id=session.id
+            )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
+
+@router.get("/cache")
+def cache_stats():
+    """Hit/miss counters for the chat response cache"""
+    return response_cache.stats()
+
+
+@router.get("/sessions")
+def session_stats():
+    return chat_sessions.stats()
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest):
+    """Server-Sent Events version of /chat.
+
+    Emits ``products`` as soon as retrieval finishes, ``token`` events while
+    Gemini generates, then ``done`` with the full message and
+    ``needs_clarification`` (or ``error``). The concurrency slot is taken
+    and released inside the generator, since the body streams after this
+    handler returns and a client that disconnects first never iterates it;
+    a shed request gets an ``error`` event instead of a 503.
+    """
+    session = get_session(request)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            await chat_limiter.acquire()
+        except HTTPException as e:
+            yield sse_event("error", {"detail": e.detail})
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                async for event in stream_events(RAGService(db), request.message, session):
+                    yield event
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Chat error: {str(e)}"})
+        finally:
+            chat_limiter.release()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def stream_events(rag_service: RAGService, message: str, session: ChatSession) -> AsyncIterator[str]:
+    async for event, payload in rag_service.stream_response(message, session=session):
+        if event == "products":
+            with span("serialize"):
+                products = [ProductResponse.model_validate(p).model_dump(mode="json") for p in payload]
+            yield sse_event("products", products)
+        elif event == "token":
+            yield sse_event("token", {"text": payload})
+        else:
+            yield sse_event("done", {
+                "message": payload,
+                "needs_clarification": rag_service.needs_clarification(payload),
+                "session_id": session.id
+            })
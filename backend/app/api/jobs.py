@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.core.database import get_db
+from app.models.job import Job
+from app.schemas.job import JobResponse
+from app.services.job_runner import describe_job
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("", response_model=List[JobResponse])
+def list_jobs(
+    job_type: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    query = db.query(Job)
+    if job_type:
+        query = query.filter(Job.job_type == job_type)
+    jobs = query.order_by(Job.created_at.desc()).limit(limit).all()
+    return [JobResponse(**describe_job(job)) for job in jobs]
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(job_id: str, db: Session = Depends(get_db)):
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobResponse(**describe_job(job))
@@ -1,44 +1,99 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import get_db
-from app.services.product_service import ProductService
-from app.schemas.product import ProductResponse, ProductListResponse
+from typing import List, Optional
+from app.core.database import get_async_db, get_db
+from app.services.catalog_cache import catalog_cache
+from app.services.product_service import ProductService, search_products_async
+from app.schemas.product import (
+    ProductFacetsResponse, ProductFilters, ProductResponse, ProductListResponse
+)
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 
+def cached_json(request: Request, body: bytes, etag: str) -> Response:
+    """Send pre-serialized JSON, or 304 when the client already has this ETag"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def product_filters(
+    category: Optional[List[str]] = Query(None),
+    product_type: Optional[List[str]] = Query(None),
+    vendor: Optional[List[str]] = Query(None),
+    source: Optional[List[str]] = Query(None),
+    tag: Optional[List[str]] = Query(None),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+) -> ProductFilters:
+    return ProductFilters(
+        category=category,
+        product_type=product_type,
+        vendor=vendor,
+        source=source,
+        tags=tag,
+        min_price=min_price,
+        max_price=max_price,
+    )
+
+
 @router.get("", response_model=ProductListResponse)
 def get_products(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    filters: ProductFilters = Depends(product_filters),
     db: Session = Depends(get_db)
 ):
-    service = ProductService(db)
-    products = service.get_all_products(skip=skip, limit=limit)
-    total = service.get_products_count()
-    return ProductListResponse(
-        products=[ProductResponse.model_validate(p) for p in products],
-        total=total
+    def load():
+        service = ProductService(db)
+        try:
+            products, next_cursor = service.list_products(filters, limit, cursor=cursor, skip=skip)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        total = catalog_cache.memo(
+            ("count", filters.cache_key()), lambda: service.count_products(filters)
+        )
+        return products, {"total": total, "next_cursor": next_cursor}
+    
+    key = ("list", filters.cache_key(), cursor, skip, limit)
+    body, etag = catalog_cache.get_page(key, load)
+    return cached_json(request, body, etag)
+
+
+@router.get("/facets", response_model=ProductFacetsResponse)
+def get_facets(
+    request: Request,
+    filters: ProductFilters = Depends(product_filters),
+    db: Session = Depends(get_db)
+):
+    body, etag = catalog_cache.get_json(
+        ("facets", filters.cache_key()), lambda: ProductService(db).get_facets(filters)
     )
+    return cached_json(request, body, etag)
 
 
 @router.get("/search", response_model=List[ProductResponse])
-def search_products(
+async def search_products(
     q: str = Query(..., min_length=1),
     limit: int = Query(20, ge=1, le=50),
-    db: Session = Depends(get_db)
+    fuzzy: Optional[bool] = Query(None, description="Trigram fallback for typos; defaults to settings"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    service = ProductService(db)
-    products = service.search_products(query=q, limit=limit)
+    products = await search_products_async(db, query=q, limit=limit, fuzzy=fuzzy)
     return [ProductResponse.model_validate(p) for p in products]
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    service = ProductService(db)
-    product = service.get_product_by_id(product_id)
-    if not product:
+def get_product(request: Request, product_id: int, db: Session = Depends(get_db)):
+    cached = catalog_cache.get_product(
+        product_id, lambda: ProductService(db).get_product_row(product_id)
+    )
+    if not cached:
         raise HTTPException(status_code=404, detail="Product not found")
-    return ProductResponse.model_validate(product)
+    return cached_json(request, *cached)
 
@@ -1,66 +1,72 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-import time
-from app.core.database import get_db
-from app.scraper.traya_scraper import TrayaScraper
-from app.services.product_service import ProductService
-from app.schemas.product import ProductCreate
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from app.core.config import get_settings
+from app.models.job import Job
+from app.schemas.job import JobSubmitResponse
+from app.services.jobs import job_runner
+
+settings = get_settings()
 
 router = APIRouter(prefix="/scraper", tags=["scraper"])
 
 
-@router.post("/run")
-def trigger_scraper(db: Session = Depends(get_db)):
-    """Trigger the scraper to fetch products from Traya.health (without embeddings)"""
-    scraper = TrayaScraper()
-    try:
-        products = scraper.scrape_products(min_products=30)
-        service = ProductService(db)
-        
-        created_count = 0
-        for product_data in products:
-            product_create = ProductCreate(**product_data)
-            service.create_product(product_create)
-            created_count += 1
-        
-        return {
-            "status": "success",
-            "message": f"Scraped and stored {created_count} products (embeddings pending)",
-            "products_count": created_count
-        }
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
-    finally:
-        scraper.close()
-
-
-@router.post("/generate-embeddings")
-def generate_embeddings(db: Session = Depends(get_db)):
-    """Generate embeddings for products that don't have them (with rate limiting)"""
-    service = ProductService(db)
-    count = 0
-    errors = 0
-    
-    products = db.query(service.db.query.__self__.query(
-        __import__('app.models.product', fromlist=['Product']).Product
-    ).filter_by(embedding=None)).all() if False else []
-    
-    from app.models.product import Product
-    products = db.query(Product).filter(Product.embedding == None).limit(10).all()
-    
-    for product in products:
-        try:
-            service.generate_and_store_embedding(product)
-            count += 1
-            time.sleep(2)  # Rate limit: 1 request per 2 seconds
-        except Exception as e:
-            errors += 1
-            print(f"Error generating embedding for product {product.id}: {e}")
-            time.sleep(5)  # Wait longer on error
-    
-    return {
-        "status": "success", 
-        "embeddings_generated": count,
-        "errors": errors,
-        "remaining": db.query(Product).filter(Product.embedding == None).count()
-    }
+def job_response(job: Job, deduplicated: bool, description: str) -> JobSubmitResponse:
+    message = f"{description} already {job.status}" if deduplicated else f"{description} queued"
+    return JobSubmitResponse(
+        status=job.status,
+        message=f"{message}; poll /api/jobs/{job.id} for progress",
+        job_id=job.id,
+        deduplicated=deduplicated
+    )
+
+
+def submit_job(job_type: str, params: dict, description: str) -> JobSubmitResponse:
+    return job_response(*job_runner.submit(job_type, params), description)
+
+
+def crawl_stores(params: dict) -> List[str]:
+    """Store names a scrape job covers; no ``stores`` param means all of them"""
+    return sorted(params.get("stores") or settings.scraper_stores)
+
+
+@router.post("/run", response_model=JobSubmitResponse)
+def trigger_scraper(store: Optional[List[str]] = Query(None, description="Stores to crawl; all by default")):
+    """Queue a catalog sync of the configured Shopify stores (without embeddings).
+
+    Every store is paged through to the end. A store's products missing
+    upstream are deleted only when its crawl finished without errors. While
+    a sync of a different set of stores is active this returns 409.
+    """
+    unknown = [name for name in store or [] if name not in settings.scraper_stores]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown stores: {', '.join(unknown)}")
+    params = {"stores": sorted(set(store))} if store else {}
+    job, deduplicated = job_runner.submit("scrape", params)
+    # Only one scrape runs at a time; joining it is only right when it covers the same stores
+    if deduplicated and crawl_stores(job.params or {}) != crawl_stores(params):
+        raise HTTPException(
+            status_code=409,
+            detail=f"A catalog sync of {', '.join(crawl_stores(job.params or {}))} is already {job.status} "
+                   f"(job {job.id}); retry once it finishes"
+        )
+    return job_response(job, deduplicated, "Catalog sync")
+
+
+@router.get("/stores")
+def list_stores():
+    return {"stores": settings.scraper_stores}
+
+
+@router.post("/generate-embeddings", response_model=JobSubmitResponse)
+def generate_embeddings(
+    limit: Optional[int] = Query(None, ge=1),
+    start_after_id: int = Query(0, ge=0)
+):
+    """Queue an embedding backfill for products that don't have them.
+
+    ``start_after_id`` skips rows up to that id, e.g. ones that already
+    failed in a previous run.
+    """
+    return submit_job(
+        "embeddings", {"limit": limit, "start_after_id": start_after_id}, "Embedding backfill"
+    )
@@ -0,0 +1,48 @@
+import asyncio
+from fastapi import HTTPException
+
+
+class ConcurrencyLimiter:
+    """Caps in-flight requests for one route family.
+
+    Up to ``max_concurrent`` requests run at once and up to ``max_queue``
+    more wait at most ``queue_timeout`` seconds for a slot; anything beyond
+    that is shed with a 503 so other endpoints keep their capacity.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.waiting = 0
+        self.in_flight = 0
+        self.shed = 0
+
+    def _reject(self, reason: str) -> HTTPException:
+        self.shed += 1
+        return HTTPException(status_code=503, detail=reason, headers={"Retry-After": "1"})
+
+    async def acquire(self) -> None:
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            raise self._reject("Server busy, please retry")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject("Timed out waiting for capacity, please retry")
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    async def __call__(self):
+        """FastAPI dependency holding a slot for the duration of the request"""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
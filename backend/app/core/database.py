@@ -1,17 +1,105 @@
-from sqlalchemy import create_engine
+import time
+import uuid
+from typing import Dict, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 from app.core.config import get_settings
+from app.core.metrics import registry
 
 settings = get_settings()
 
+POOL_CHECKOUT_WAIT = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", ("engine",)
+)
+# engine label -> checkouts that gave up after pool_timeout
+pool_timeouts: Dict[str, int] = {"sync": 0, "async": 0}
+
+
+class _TimedCheckout:
+    """Pool mixin that observes how long each checkout waited, including
+    opening a new connection when the pool grows"""
+    engine_label = ""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_timeouts[self.engine_label] += 1
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started, self.engine_label)
+
+
+class SyncPool(_TimedCheckout, QueuePool):
+    engine_label = "sync"
+
+
+class AsyncPool(_TimedCheckout, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+
+class AsyncNullPool(_TimedCheckout, NullPool):
+    engine_label = "async"
+
+
+def async_database_url(url: str) -> str:
+    """Rewrite a psycopg2-style URL for asyncpg (driver and sslmode -> ssl)"""
+    parts = urlsplit(url)
+    scheme = parts.scheme.split("+")[0]
+    if scheme in ("postgres", "postgresql"):
+        scheme = "postgresql+asyncpg"
+    query = []
+    for key, value in parse_qsl(parts.query):
+        query.append(("ssl", value) if key == "sslmode" else (key, value))
+    return urlunsplit((scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
+
+
 engine = create_engine(
     settings.database_url,
-    pool_pre_ping=True,
-    pool_recycle=300,
+    poolclass=SyncPool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def async_engine_options() -> dict:
+    """Pool and driver options for the asyncpg engine.
+
+    In pgbouncer mode (transaction pooling) consecutive transactions may run
+    on different server connections, so asyncpg must not cache prepared
+    statements, names must be unique, and the proxy does the pooling.
+    """
+    if settings.db_pgbouncer:
+        return {
+            "poolclass": AsyncNullPool,
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            },
+        }
+    return {
+        "poolclass": AsyncPool,
+        "pool_size": settings.async_db_pool_size,
+        "max_overflow": settings.async_db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+async_engine = create_async_engine(async_database_url(settings.database_url), **async_engine_options())
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 
 def get_db():
     db = SessionLocal()
@@ -19,3 +107,31 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def pool_engines() -> Dict[str, Engine]:
+    return {"sync": engine, "async": async_engine.sync_engine}
+
+
+def pool_status() -> Dict[Tuple[str], Dict[str, float]]:
+    """Per-engine pool occupancy; engines without a queue pool are left out"""
+    status = {}
+    for label, pooled_engine in pool_engines().items():
+        pool = pooled_engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        # max_overflow of -1 means unbounded; saturation is then relative to size
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        checked_out = pool.checkedout()
+        status[(label,)] = {
+            "size": pool.size(),
+            "checked_out": checked_out,
+            "idle": pool.checkedin(),
+            "saturation": checked_out / capacity if capacity > 0 else 0.0,
+        }
+    return status
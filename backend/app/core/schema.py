@@ -0,0 +1,170 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from app.core.config import get_settings
+
+settings = get_settings()
+
+VECTOR_INDEX_PREFIX = "ix_products_embedding_"
+
+# create_all() only creates missing tables, so columns added to existing
+# tables are applied here
+PRODUCT_COLUMNS = [
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS embedding_hash VARCHAR(64)",
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(200)",
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector TSVECTOR",
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS source VARCHAR(100)",
+]
+
+# One-off data migrations, applied once each and recorded in schema_migrations
+MIGRATIONS_TABLE = (
+    "CREATE TABLE IF NOT EXISTS schema_migrations "
+    "(name VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+)
+MIGRATIONS = [
+    # Rows from before multi-store scraping all came from Traya
+    ("products_source_traya", "UPDATE products SET source = 'traya' WHERE source IS NULL"),
+]
+
+# search_vector weights title A, features/tags B and description C. A trigger
+# rather than a generated column, because array_to_string isn't immutable
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('{config}', coalesce({row}title, '')), 'A') || "
+    "setweight(to_tsvector('{config}', coalesce({row}features, '') || ' ' || "
+    "coalesce(array_to_string({row}tags, ' '), '')), 'B') || "
+    "setweight(to_tsvector('{config}', coalesce({row}description, '')), 'C')"
+)
+
+
+def search_statements() -> list:
+    config = settings.text_search_config
+    return [
+        "CREATE OR REPLACE FUNCTION products_search_vector_update() RETURNS trigger AS $$ "
+        "BEGIN NEW.search_vector := "
+        + SEARCH_VECTOR_EXPRESSION.format(config=config, row="NEW.")
+        + "; RETURN NEW; END $$ LANGUAGE plpgsql",
+        "UPDATE products SET search_vector = "
+        + SEARCH_VECTOR_EXPRESSION.format(config=config, row="")
+        + " WHERE search_vector IS NULL",
+        "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING gin (search_vector)",
+    ]
+
+
+# Created only when missing: (re)creating a trigger locks the table exclusively
+SEARCH_TRIGGER_EXISTS = (
+    "SELECT 1 FROM pg_trigger WHERE tgname = 'products_search_vector' "
+    "AND tgrelid = 'products'::regclass"
+)
+SEARCH_TRIGGER = (
+    "CREATE TRIGGER products_search_vector BEFORE INSERT OR UPDATE OF title, description, features, tags "
+    "ON products FOR EACH ROW EXECUTE FUNCTION products_search_vector_update()"
+)
+
+# Typo-tolerant title matching; managed databases may not allow pg_trgm
+TRIGRAM_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_products_title_trgm ON products USING gin (title gin_trgm_ops)",
+]
+
+# False once ensure_schema found pg_trgm unavailable; turns off the fuzzy fallback
+trigram_available = True
+
+# Listing filters and facets (ProductService.list_products / get_facets)
+PRODUCT_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_products_category ON products (category)",
+    "CREATE INDEX IF NOT EXISTS ix_products_product_type ON products (product_type)",
+    "CREATE INDEX IF NOT EXISTS ix_products_vendor ON products (vendor)",
+    "CREATE INDEX IF NOT EXISTS ix_products_source ON products (source)",
+    "CREATE INDEX IF NOT EXISTS ix_products_price ON products (price)",
+    "CREATE INDEX IF NOT EXISTS ix_products_tags ON products USING gin (tags)",
+]
+
+JOB_COLUMNS = [
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS owner VARCHAR(100)",
+]
+
+# At most one queued/running job per type; JobRunner.submit relies on this
+# to deduplicate submissions across processes
+JOB_INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_jobs_active_type ON jobs (job_type) "
+    "WHERE status IN ('queued', 'running')",
+]
+
+
+def ensure_schema(engine: Engine) -> None:
+    """Apply column and data migrations, then full-text and trigram search, each in its own transaction.
+
+    Columns and job indexes go first since ORM queries need them; a failing
+    search step is reported and leaves them in place.
+    """
+    global trigram_available
+    with engine.begin() as conn:
+        for statement in PRODUCT_COLUMNS + PRODUCT_INDEXES + JOB_COLUMNS + JOB_INDEXES:
+            conn.execute(text(statement))
+        apply_migrations(conn)
+    try:
+        with engine.begin() as conn:
+            ensure_full_text_search(conn)
+    except Exception as e:
+        print(f"Could not set up full-text search: {e}")
+    try:
+        with engine.begin() as conn:
+            for statement in TRIGRAM_STATEMENTS:
+                conn.execute(text(statement))
+        trigram_available = True
+    except Exception as e:
+        trigram_available = False
+        print(f"pg_trgm unavailable, fuzzy search disabled: {e}")
+
+
+def apply_migrations(conn: Connection) -> None:
+    conn.execute(text(MIGRATIONS_TABLE))
+    applied = set(conn.execute(text("SELECT name FROM schema_migrations")).scalars())
+    for name, statement in MIGRATIONS:
+        if name not in applied:
+            conn.execute(text(statement))
+            conn.execute(text("INSERT INTO schema_migrations (name) VALUES (:name) ON CONFLICT DO NOTHING"), {"name": name})
+
+
+def ensure_full_text_search(conn: Connection) -> None:
+    statements = search_statements()
+    conn.execute(text(statements[0]))
+    if conn.execute(text(SEARCH_TRIGGER_EXISTS)).first() is None:
+        conn.execute(text(SEARCH_TRIGGER))
+    for statement in statements[1:]:
+        conn.execute(text(statement))
+
+
+def vector_index_name() -> str:
+    """Index name encodes its build parameters so a settings change is detected."""
+    if settings.vector_index_type == "hnsw":
+        return f"{VECTOR_INDEX_PREFIX}hnsw_m{settings.hnsw_m}_ef{settings.hnsw_ef_construction}"
+    if settings.vector_index_type == "ivfflat":
+        return f"{VECTOR_INDEX_PREFIX}ivfflat_l{settings.ivfflat_lists}"
+    return ""
+
+
+def ensure_vector_index(conn: Connection) -> str:
+    """Create the configured ANN index on products.embedding, dropping stale ones"""
+    wanted = vector_index_name()
+    existing = conn.execute(
+        text("SELECT indexname FROM pg_indexes WHERE tablename = 'products' AND indexname LIKE :prefix"),
+        {"prefix": f"{VECTOR_INDEX_PREFIX}%"}
+    ).scalars().all()
+    
+    for name in existing:
+        if name != wanted:
+            conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+    
+    if wanted and wanted not in existing:
+        if settings.vector_index_type == "hnsw":
+            options = f"m = {settings.hnsw_m}, ef_construction = {settings.hnsw_ef_construction}"
+            method = "hnsw"
+        else:
+            options = f"lists = {settings.ivfflat_lists}"
+            method = "ivfflat"
+        conn.execute(text(
+            f'CREATE INDEX IF NOT EXISTS "{wanted}" ON products '
+            f'USING {method} (embedding vector_cosine_ops) WITH ({options})'
+        ))
+    return wanted
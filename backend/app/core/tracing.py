@@ -0,0 +1,139 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import get_settings
+from app.core.metrics import registry
+
+settings = get_settings()
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+)
+SPAN_DURATION = registry.histogram(
+    "app_span_duration_seconds", "Duration of instrumented stages", ("span",)
+)
+DB_QUERY_DURATION = registry.histogram(
+    "db_query_duration_seconds", "SQL statement latency", ("engine",)
+)
+
+
+class Trace:
+    """Per-request span totals: name -> [total_ms, count]"""
+    __slots__ = ("started", "spans")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, List[float]] = {}
+
+    def add(self, name: str, elapsed_ms: float) -> None:
+        span = self.spans.get(name)
+        if span is None:
+            self.spans[name] = [elapsed_ms, 1]
+        else:
+            span[0] += elapsed_ms
+            span[1] += 1
+
+    def server_timing(self) -> str:
+        """Server-Timing header value; ``app`` is the time until headers were sent"""
+        parts = [
+            f'{name};dur={total:.1f};desc="{int(count)}x"' if count > 1 else f"{name};dur={total:.1f}"
+            for name, (total, count) in self.spans.items()
+        ]
+        parts.append(f"app;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def record(name: str, elapsed_seconds: float) -> None:
+    SPAN_DURATION.observe(elapsed_seconds, name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, elapsed_seconds * 1000)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block as a named stage of the current request.
+
+    Works in sync and async code; the trace travels in a ContextVar, which
+    asyncio tasks and to_thread/threadpool calls inherit.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens a Trace per HTTP request.
+
+    Adds a Server-Timing header with the spans recorded before the response
+    started (for streamed responses that covers work up to the first byte)
+    and observes the request latency by route template once it completes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        token = _current_trace.set(trace)
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if settings.server_timing_enabled:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_trace.reset(token)
+            route = scope.get("route")
+            REQUEST_DURATION.observe(
+                time.perf_counter() - trace.started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status[0]),
+            )
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Record every statement on ``engine`` as a ``db`` span"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+        DB_QUERY_DURATION.observe(elapsed, name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add("db", elapsed * 1000)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        stack = context.connection.info.get("query_started") if context.connection is not None else None
+        if stack:
+            stack.pop()
@@ -1,9 +1,22 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from sqlalchemy import text
-from app.core.database import engine, Base
-from app.api import products, chat, scraper
+from app.core.database import engine, async_engine, Base, SessionLocal, pool_status, pool_timeouts
+from app.api import products, chat, scraper, jobs
+from app.core.config import get_settings
+from app.core.metrics import registry
+from app.core.tracing import TracingMiddleware, instrument_engine
+from app.core.schema import ensure_schema, ensure_vector_index
+from app.scraper.parsing import shutdown_parse_pool
+from app.services.embedding_service import warmup as warmup_embeddings
+from app.services.jobs import job_runner
+from app.services.rag_service import hybrid_leg_failures
+from app.services.search_index import search_index
+from app.services.vector_matrix import vector_matrix, vector_matrix_enabled
+
+settings = get_settings()
 
 
 @asynccontextmanager
@@ -15,7 +28,42 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Note: pgvector extension might already exist: {e}")
     Base.metadata.create_all(bind=engine)
+    try:
+        ensure_schema(engine)
+    except Exception as e:
+        print(f"Could not apply schema updates: {e}")
+    try:
+        with engine.begin() as conn:
+            index_name = ensure_vector_index(conn)
+        print(f"Vector index: {index_name or 'disabled'}")
+    except Exception as e:
+        print(f"Could not create vector index: {e}")
+    try:
+        with SessionLocal() as db:
+            indexed = search_index.rebuild(db)
+        print(f"Search index built for {indexed} products")
+    except Exception as e:
+        print(f"Search index build deferred to first query: {e}")
+    if vector_matrix_enabled():
+        try:
+            with SessionLocal() as db:
+                loaded = vector_matrix.rebuild(db)
+            print(f"Vector matrix loaded: {loaded} embeddings, {vector_matrix.nbytes / 2**20:.1f}MB")
+        except Exception as e:
+            print(f"Vector matrix load deferred to first query: {e}")
+    if settings.embedding_warmup:
+        try:
+            warmup_embeddings()
+        except Exception as e:
+            print(f"Embedding warmup failed: {e}")
+    try:
+        job_runner.start()
+    except Exception as e:
+        print(f"Could not start job runner: {e}")
     yield
+    job_runner.stop()
+    shutdown_parse_pool()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -25,6 +73,11 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware)
+    instrument_engine(engine, "sync")
+    instrument_engine(async_engine.sync_engine, "async")
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -36,6 +89,7 @@ app.add_middleware(
 app.include_router(products.router, prefix="/api")
 app.include_router(chat.router, prefix="/api")
 app.include_router(scraper.router, prefix="/api")
+app.include_router(jobs.router, prefix="/api")
 
 
 @app.get("/")
@@ -46,3 +100,35 @@ def root():
 @app.get("/health")
 def health():
     return {"status": "healthy"}
+
+
+registry.gauge("chat_in_flight", "Chat requests being served", lambda: chat.chat_limiter.in_flight)
+registry.gauge("chat_waiting", "Chat requests queued for a slot", lambda: chat.chat_limiter.waiting)
+registry.counter("chat_shed_total", "Chat requests shed for lack of capacity", lambda: chat.chat_limiter.shed)
+registry.gauge("search_index_products", "Products in the keyword index", lambda: len(search_index))
+registry.counter(
+    "hybrid_leg_failures_total", "Hybrid retrieval legs that timed out or failed",
+    lambda: dict(hybrid_leg_failures), ("leg", "reason")
+)
+
+
+def pool_gauge(field: str):
+    return lambda: {labels: status[field] for labels, status in pool_status().items()}
+
+
+registry.gauge("db_pool_size", "Connections kept in the pool", pool_gauge("size"), ("engine",))
+registry.gauge("db_pool_checked_out", "Pooled connections in use", pool_gauge("checked_out"), ("engine",))
+registry.gauge("db_pool_idle", "Pooled connections idle", pool_gauge("idle"), ("engine",))
+registry.gauge(
+    "db_pool_saturation", "Checked-out share of pool_size + max_overflow", pool_gauge("saturation"), ("engine",)
+)
+registry.counter(
+    "db_pool_timeouts_total", "Checkouts that timed out waiting for a connection",
+    lambda: {(label,): count for label, count in pool_timeouts.items()}, ("engine",)
+)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus text exposition"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime, func
+from pgvector.sqlalchemy import Vector
+from app.core.database import Base
+
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "embedding_cache"
+
+    content_hash = Column(String(64), primary_key=True)
+    model = Column(String(200), nullable=False)
+    embedding = Column(Vector(384), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, func
+from app.core.database import Base
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String(36), primary_key=True)
+    job_type = Column(String(50), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    params = Column(JSON, nullable=True)
+    # Handler-defined resume point, merged into params when a job is resumed
+    checkpoint = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    processed = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=True)
+    errors = Column(Integer, nullable=False, default=0)
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Runner process (JobRunner.owner_id) that claimed the job
+    owner = Column(String(100), nullable=True)
+    # Worker heartbeat: refreshed by the owning runner and on every progress report
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,6 @@
 from sqlalchemy import Column, Integer, String, Float, Text, ARRAY
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 from pgvector.sqlalchemy import Vector
 from app.core.database import Base
 
@@ -20,7 +22,18 @@ class Product(Base):
     product_type = Column(String(200), nullable=True)
     tags = Column(ARRAY(String), nullable=True)
     url = Column(String(1000), nullable=True)
+    # Store the product was scraped from (a key of settings.scraper_stores)
+    source = Column(String(100), nullable=True)
     embedding = Column(Vector(384), nullable=True)
+    # Hash of the scraped catalog fields, used by CatalogSync to skip unchanged rows
+    content_hash = Column(String(64), nullable=True)
+    # EmbeddingService.content_hash of the product text, and the model the
+    # stored embedding came from
+    embedding_hash = Column(String(64), nullable=True)
+    embedding_model = Column(String(200), nullable=True)
+    # Weighted full-text document, maintained by the products_search_vector
+    # trigger (see app.core.schema); deferred since only search filters on it
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
 
     def to_dict(self):
         return {
@@ -37,5 +50,16 @@ class Product(Base):
             "vendor": self.vendor,
             "product_type": self.product_type,
             "tags": self.tags,
-            "url": self.url
+            "url": self.url,
+            "source": self.source
         }
+
+
+# The columns ProductResponse needs. Read paths select these and get back
+# lightweight Row tuples rather than Product instances, so the embedding
+# and the bookkeeping columns are never loaded for a response
+RESPONSE_COLUMNS = (
+    Product.id, Product.external_id, Product.title, Product.price, Product.compare_price,
+    Product.description, Product.features, Product.image_url, Product.images, Product.category,
+    Product.vendor, Product.product_type, Product.tags, Product.url, Product.source,
+)
@@ -10,6 +10,11 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
+    # Server-side session from a previous response. Send conversation_history
+    # only without one: it seeds a new session. A session_id that is no longer
+    # live (expired, evicted or lost to a restart) gets a 409 so the client
+    # can retry with its history
+    session_id: Optional[str] = None
     conversation_history: Optional[List[ChatMessage]] = []
 
 
@@ -17,4 +22,5 @@ class ChatResponse(BaseModel):
     message: str
     products: Optional[List[ProductResponse]] = []
     needs_clarification: bool = False
+    session_id: Optional[str] = None
 
@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, Any, Dict
+
+
+class JobResponse(BaseModel):
+    id: str
+    job_type: str
+    status: str
+    params: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    processed: int = 0
+    total: Optional[int] = None
+    errors: int = 0
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    throughput_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+
+class JobSubmitResponse(BaseModel):
+    status: str
+    message: str
+    job_id: str
+    deduplicated: bool = False
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 
 class ProductBase(BaseModel):
@@ -15,6 +15,7 @@ class ProductBase(BaseModel):
     product_type: Optional[str] = None
     tags: Optional[List[str]] = None
     url: Optional[str] = None
+    source: Optional[str] = None
 
 
 class ProductCreate(ProductBase):
@@ -32,4 +33,32 @@ class ProductResponse(ProductBase):
 class ProductListResponse(BaseModel):
     products: List[ProductResponse]
     total: int
+    next_cursor: Optional[str] = None
+
+
+class ProductFilters(BaseModel):
+    """Listing filters; values within a field are OR'ed, fields are AND'ed"""
+    category: Optional[List[str]] = None
+    product_type: Optional[List[str]] = None
+    vendor: Optional[List[str]] = None
+    source: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+    def cache_key(self) -> tuple:
+        return tuple(
+            (name, tuple(sorted(value)) if isinstance(value, list) else value)
+            for name, value in self.model_dump().items()
+        )
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class ProductFacetsResponse(BaseModel):
+    total: int
+    facets: Dict[str, List[FacetCount]]
 
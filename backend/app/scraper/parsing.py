@@ -0,0 +1,230 @@
+"""Shopify product parsing, kept free of app imports so pool workers start cheaply.
+
+``html_to_text`` reproduces ``BeautifulSoup(html, "html.parser").get_text(" ", strip=True)``
+followed by whitespace collapsing, without building a tree: text between tags
+is buffered and emitted as one piece per tag boundary, script/style/template
+contents, comments, doctypes and processing instructions are dropped, and
+character references are resolved the way Beautiful Soup's builder does.
+"""
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from html.entities import html5
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+
+    def json_loads(data):
+        return orjson.loads(data)
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    import json
+
+    def json_loads(data):
+        return json.loads(data)
+
+
+# Tags whose text Beautiful Soup stores as Script/Stylesheet/TemplateString,
+# which get_text() leaves out
+_SKIPPED_TAGS = frozenset(("script", "style", "template"))
+_VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen",
+    "link", "menuitem", "meta", "param", "source", "track", "wbr", "basefont",
+    "bgsound", "command", "frame", "image", "isindex", "nextid", "spacer",
+))
+_ENTITIES = {name[:-1]: character for name, character in html5.items() if name.endswith(";")}
+_WHITESPACE_RE = re.compile(r"\s+")
+_FEATURE_KEYWORDS_RE = re.compile("benefit|feature|contains|ingredient|helps|reduces|promotes")
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.pieces: List[str] = []
+        self._buffer: List[str] = []
+        self._open: List[str] = []
+        self._closed_void: List[str] = []
+        self._skipping = 0
+
+    def _flush(self) -> None:
+        if self._buffer:
+            if not self._skipping:
+                self.pieces.append("".join(self._buffer))
+            self._buffer.clear()
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in _VOID_TAGS:
+            # Closed right away; a later explicit </tag> is then ignored
+            self._closed_void.append(tag)
+            return
+        self._push(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+        self._push(tag)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_void:
+            self._closed_void.remove(tag)
+            return
+        self._flush()
+        # Like the tree builder, an end tag closes everything opened after
+        # its start tag; an unmatched end tag is ignored
+        if tag not in self._open:
+            return
+        while True:
+            closed = self._open.pop()
+            if closed in _SKIPPED_TAGS:
+                self._skipping -= 1
+            if closed == tag:
+                break
+
+    def _push(self, tag):
+        self._open.append(tag)
+        if tag in _SKIPPED_TAGS:
+            self._skipping += 1
+
+    def handle_data(self, data):
+        self._buffer.append(data)
+
+    def handle_charref(self, name):
+        if name[0] in "xX":
+            codepoint = int(name.lstrip("xX"), 16)
+        else:
+            codepoint = int(name)
+        data = None
+        if codepoint < 256:
+            # &#150; and friends usually mean windows-1252
+            try:
+                data = bytes([codepoint]).decode("windows-1252")
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(codepoint)
+            except (ValueError, OverflowError):
+                pass
+        self._buffer.append(data or "\N{REPLACEMENT CHARACTER}")
+
+    def handle_entityref(self, name):
+        self._buffer.append(_ENTITIES.get(name, "&" + name))
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.upper().startswith("CDATA["):
+            self.pieces.append(data[len("CDATA["):])
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+
+def html_to_text(html_text: str) -> str:
+    extractor = _TextExtractor()
+    extractor.feed(html_text)
+    extractor.close()
+    extractor._flush()
+    return _WHITESPACE_RE.sub(" ", " ".join(extractor.pieces)).strip()
+
+
+def clean_html(html_text: str) -> str:
+    """Remove HTML tags and clean text"""
+    if not html_text:
+        return ""
+    if "<" not in html_text and "&" not in html_text:
+        return _WHITESPACE_RE.sub(" ", html_text).strip()
+    return html_to_text(html_text)
+
+
+def extract_features(description: str, tags: List[str]) -> str:
+    """Extract key features from description and tags"""
+    features = [tag for tag in tags if tag] if tags else []
+    if description:
+        # Lowercasing never adds or removes '.', so both splits line up
+        for sentence, lowered in zip(description.split("."), description.lower().split(".")):
+            if _FEATURE_KEYWORDS_RE.search(lowered):
+                clean_sentence = sentence.strip()
+                if len(clean_sentence) > 10:
+                    features.append(clean_sentence)
+    return " | ".join(features[:10]) if features else ""
+
+
+def parse_product(product_data: Dict[str, Any], base_url: str, source: Optional[str] = None,
+                  default_vendor: str = "Traya") -> Dict[str, Any]:
+    """Parse a single product from Shopify JSON format"""
+    variants = product_data.get("variants", [])
+    first_variant = variants[0] if variants else {}
+
+    price = float(first_variant.get("price", 0))
+    compare_price = first_variant.get("compare_at_price")
+    if compare_price:
+        compare_price = float(compare_price)
+
+    images = product_data.get("images", [])
+    image_urls = [img.get("src", "") for img in images if img.get("src")]
+    main_image = image_urls[0] if image_urls else None
+
+    description = clean_html(product_data.get("body_html", ""))
+
+    tags = product_data.get("tags", [])
+    if isinstance(tags, str):
+        tags = [t.strip() for t in tags.split(",")]
+
+    features = extract_features(description, tags)
+
+    product_type = product_data.get("product_type", "")
+    vendor = product_data.get("vendor", default_vendor)
+
+    category = product_type if product_type else "Hair Care"
+
+    return {
+        "external_id": str(product_data.get("id", "")),
+        "title": product_data.get("title", ""),
+        "price": price,
+        "compare_price": compare_price,
+        "description": description[:2000] if description else None,
+        "features": features[:1000] if features else None,
+        "image_url": main_image,
+        "images": image_urls[:5],
+        "category": category,
+        "vendor": vendor,
+        "product_type": product_type,
+        "tags": tags[:20] if tags else [],
+        "url": f"{base_url}/products/{product_data.get('handle', '')}",
+        "source": source
+    }
+
+
+def parse_products_page(body: bytes, base_url: str, source: Optional[str] = None,
+                        default_vendor: str = "Traya") -> List[Dict[str, Any]]:
+    """Decode a raw products.json body and parse every product in it"""
+    return [
+        parse_product(product, base_url, source, default_vendor)
+        for product in json_loads(body).get("products", [])
+    ]
+
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared worker pool for large pages; spawned so workers don't inherit app threads"""
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _parse_pool
+
+
+def shutdown_parse_pool() -> None:
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(cancel_futures=True)
+        _parse_pool = None
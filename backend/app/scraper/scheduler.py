@@ -0,0 +1,94 @@
+import asyncio
+import time
+import httpx
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from app.core.config import get_settings
+from app.core.rate_limit import AdaptiveRateLimiter
+from app.scraper.shopify import ShopifySource, host_client
+
+settings = get_settings()
+
+
+class CrawlScheduler:
+    """Crawls many Shopify stores in parallel with per-host limits.
+
+    Stores are grouped by host; each host gets one connection pool and one
+    adaptive rate limiter, shared by its stores, which are crawled one after
+    another. Up to ``max_hosts`` hosts are crawled at once and every store is
+    paged through to exhaustion, so a crawl takes about as long as the
+    slowest host instead of the sum of all pages.
+    """
+
+    def __init__(
+        self,
+        stores: Dict[str, str],
+        max_hosts: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        requests_per_second: Optional[float] = None,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ):
+        self.stores = stores
+        # Called with the total products scraped so far, after every page window
+        self.on_progress = on_progress
+        self.max_hosts = max_hosts or settings.scraper_max_hosts
+        self.max_concurrency = max_concurrency or settings.scraper_max_concurrency
+        self.requests_per_second = requests_per_second or settings.scraper_requests_per_second
+
+    def hosts(self) -> "OrderedDict[str, Dict[str, str]]":
+        """host -> {store name: base url}"""
+        grouped: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        for name, base_url in self.stores.items():
+            grouped.setdefault(httpx.URL(base_url).host, {})[name] = base_url
+        return grouped
+
+    async def crawl(self) -> Dict[str, Any]:
+        """Returns ``{"products": [...], "sources": {name: stats}}``.
+
+        A source's stats include ``complete``; only complete sources may have
+        their missing products deleted.
+        """
+        semaphore = asyncio.Semaphore(self.max_hosts)
+        products: List[Dict[str, Any]] = []
+        sources: Dict[str, Dict[str, Any]] = {}
+        in_progress: Dict[str, int] = {}
+
+        def report(name: str, scraped: int) -> None:
+            in_progress[name] = scraped
+            if self.on_progress is not None:
+                self.on_progress(sum(in_progress.values()))
+
+        async def crawl_host(host: str, stores: Dict[str, str]):
+            async with semaphore:
+                client = host_client(self.max_concurrency)
+                rate_limiter = AdaptiveRateLimiter(self.requests_per_second)
+                try:
+                    for name, base_url in stores.items():
+                        source = ShopifySource(
+                            name,
+                            base_url,
+                            max_concurrency=self.max_concurrency,
+                            client=client,
+                            rate_limiter=rate_limiter,
+                            on_page=lambda scraped, name=name: report(name, scraped),
+                        )
+                        started = time.perf_counter()
+                        try:
+                            scraped = await source.scrape_products()
+                        except Exception as e:
+                            print(f"Crawl of {name} failed: {e}")
+                            scraped = []
+                            source.complete = False
+                        products.extend(scraped)
+                        sources[name] = {
+                            "host": host,
+                            "products": len(scraped),
+                            "complete": source.complete,
+                            "seconds": round(time.perf_counter() - started, 2),
+                            **source.stats,
+                        }
+                finally:
+                    await client.aclose()
+
+        await asyncio.gather(*(crawl_host(host, stores) for host, stores in self.hosts().items()))
+        return {"products": products, "sources": sources}
@@ -0,0 +1,173 @@
+import asyncio
+import httpx
+from collections import OrderedDict
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from app.core.config import get_settings
+from app.core.rate_limit import AdaptiveRateLimiter
+from app.scraper import parsing
+
+settings = get_settings()
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+
+# url -> (etag, last_modified, parsed products); kept per process so a repeat
+# sync revalidates each page with a conditional GET and skips re-parsing.
+# Bounded to scraper_page_cache_pages, least recently used first out.
+_page_cache: "OrderedDict[str, Tuple[Optional[str], Optional[str], List[Dict[str, Any]]]]" = OrderedDict()
+
+
+def _remember_page(url: str, etag: Optional[str], last_modified: Optional[str],
+                   products: List[Dict[str, Any]]) -> None:
+    if not (etag or last_modified):
+        # Nothing to revalidate with, so the page can never be served from cache
+        _page_cache.pop(url, None)
+        return
+    _page_cache[url] = (etag, last_modified, products)
+    _page_cache.move_to_end(url)
+    while len(_page_cache) > settings.scraper_page_cache_pages:
+        _page_cache.popitem(last=False)
+
+
+class ThrottledError(Exception):
+    pass
+
+
+def host_client(max_connections: int) -> httpx.AsyncClient:
+    """HTTP/2 client sized for one host; sources on the same host share it"""
+    return httpx.AsyncClient(
+        http2=True,
+        headers={"User-Agent": USER_AGENT},
+        timeout=30.0,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        )
+    )
+
+
+class ShopifySource:
+    """One Shopify storefront, crawled through its public ``/products.json``.
+
+    Pages are requested in windows of ``max_concurrency``, paced by an
+    adaptive rate limiter, and revalidated with ETag/Last-Modified so an
+    unchanged page costs a single 304. Parsed products carry ``source=name``.
+    Pass ``client`` and ``rate_limiter`` to share them with other sources on
+    the same host; otherwise the source owns its own.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        default_vendor: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        requests_per_second: Optional[float] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        on_page: Optional[Callable[[int], None]] = None,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.products_json_url = f"{self.base_url}/products.json"
+        self.default_vendor = default_vendor or name.title()
+        self.max_concurrency = max_concurrency or settings.scraper_max_concurrency
+        self.page_size = settings.scraper_page_size
+        self._owns_client = client is None
+        self.client = client or host_client(self.max_concurrency)
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(
+            requests_per_second or settings.scraper_requests_per_second
+        )
+        # Called with the number of products kept after each window of pages
+        self.on_page = on_page
+        self.stats = {"pages": 0, "not_modified": 0, "throttled": 0, "pooled_pages": 0}
+        # True once a scrape has paged through to an empty page without errors
+        self.complete = False
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception_type((httpx.HTTPError, ThrottledError))
+    )
+    async def fetch_page(self, page: int = 1, limit: int = 50) -> List[Dict[str, Any]]:
+        """Fetch and parse one products.json page, reusing the cached parse on 304"""
+        url = f"{self.products_json_url}?page={page}&limit={limit}"
+        cached = _page_cache.get(url)
+        headers = {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        await self.rate_limiter.acquire()
+        response = await self.client.get(url, headers=headers)
+        self.stats["pages"] += 1
+
+        if response.status_code in (429, 503):
+            self.stats["throttled"] += 1
+            retry_after = response.headers.get("Retry-After")
+            self.rate_limiter.on_throttle(float(retry_after) if retry_after and retry_after.isdigit() else None)
+            raise ThrottledError(f"{response.status_code} for {url}")
+        self.rate_limiter.on_success()
+
+        if response.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            if url in _page_cache:
+                _page_cache.move_to_end(url)
+            return cached[2]
+
+        response.raise_for_status()
+        products = await self.parse_page(response.content)
+        _remember_page(url, response.headers.get("ETag"), response.headers.get("Last-Modified"), products)
+        return products
+
+    async def parse_page(self, body: bytes) -> List[Dict[str, Any]]:
+        """Parse a raw page body; large bodies go to the worker pool off the event loop"""
+        args = (body, self.base_url, self.name, self.default_vendor)
+        workers = settings.scraper_parse_workers
+        if workers > 0 and len(body) >= settings.scraper_parse_pool_min_bytes:
+            self.stats["pooled_pages"] += 1
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(parsing.get_parse_pool(workers), parsing.parse_products_page, *args)
+        return parsing.parse_products_page(*args)
+
+    async def scrape_products(self, min_products: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Scrape the catalog, stopping at the first empty page or once min_products is reached"""
+        all_products = []
+        page = 1
+        self.complete = False
+
+        while min_products is None or len(all_products) < min_products:
+            pages = list(range(page, page + self.max_concurrency))
+            results = await asyncio.gather(
+                *(self.fetch_page(page=p, limit=self.page_size) for p in pages),
+                return_exceptions=True
+            )
+
+            exhausted = False
+            for p, result in zip(pages, results):
+                if isinstance(result, Exception):
+                    print(f"Error fetching {self.name} page {p}: {result}")
+                    exhausted = True
+                    break
+                if not result:
+                    exhausted = True
+                    self.complete = True
+                    break
+                for parsed in result:
+                    if parsed["title"] and parsed["price"] > 0:
+                        all_products.append(parsed)
+
+            if self.on_page is not None:
+                self.on_page(len(all_products))
+            if exhausted:
+                break
+            page += self.max_concurrency
+
+        return all_products
+
+    async def close(self):
+        if self._owns_client:
+            await self.client.aclose()
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+from app.core.config import get_settings
+from app.core.tracing import span
+from app.schemas.product import ProductResponse
+
+settings = get_settings()
+
+# (body, etag)
+Cached = Tuple[bytes, str]
+
+
+class CatalogCache:
+    """In-process snapshot of serialized catalog responses.
+
+    Products are stored as ready-to-send JSON bytes and list pages are
+    stitched together from them, each with a strong ETag. Catalog writes in
+    this process call ``bump()``; ``ttl_seconds`` bounds how long another
+    worker's writes can go unseen.
+    """
+
+    def __init__(self, ttl_seconds: int, max_pages: int = 256, max_products: int = 4096):
+        self.ttl_seconds = ttl_seconds
+        self.max_pages = max_pages
+        self.max_products = max_products
+        self.version = 0
+        self._products: "OrderedDict[int, Cached]" = OrderedDict()
+        self._pages: "OrderedDict[Hashable, Cached]" = OrderedDict()
+        self._values: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded_at = time.monotonic()
+
+    def bump(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._products.clear()
+            self._pages.clear()
+            self._values.clear()
+            self._loaded_at = time.monotonic()
+
+    def _expire(self) -> None:
+        if self.ttl_seconds and time.monotonic() - self._loaded_at > self.ttl_seconds:
+            self.bump()
+
+    def etag(self, body: bytes) -> str:
+        # From the body alone, so it survives TTL expiry and matches across workers
+        return f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+    def serialize_product(self, product) -> Cached:
+        body = ProductResponse.model_validate(product).model_dump_json().encode("utf-8")
+        return body, self.etag(body)
+
+    def _lookup(self, store: OrderedDict, key: Hashable) -> Tuple[Any, int]:
+        """Returns ``(cached or None, version)``; pass the version back to ``_remember``"""
+        self._expire()
+        with self._lock:
+            cached = store.get(key)
+            if cached is not None:
+                store.move_to_end(key)
+            return cached, self.version
+
+    def get_product(self, product_id: int, loader: Callable[[], Optional[object]]) -> Optional[Cached]:
+        cached, version = self._lookup(self._products, product_id)
+        if cached is not None:
+            return cached
+        product = loader()
+        if product is None:
+            return None
+        return self._remember(self._products, product_id, self.serialize_product(product), version)
+
+    def get_page(self, key: Hashable, loader: Callable[[], Tuple[Iterable, Dict[str, Any]]]) -> Cached:
+        """Serve a ``{"products": [...], **meta}`` page, loading (products, meta) on a miss"""
+        cached, version = self._lookup(self._pages, key)
+        if cached is not None:
+            return cached
+        products, meta = loader()
+        with span("serialize"):
+            bodies = []
+            for product in products:
+                with self._lock:
+                    cached_product = self._products.get(product.id)
+                if cached_product is None:
+                    cached_product = self._remember(
+                        self._products, product.id, self.serialize_product(product), version
+                    )
+                bodies.append(cached_product[0])
+            body = b'{"products":[' + b",".join(bodies) + b"]"
+            if meta:
+                body += b"," + json.dumps(meta, separators=(",", ":")).encode("utf-8")[1:-1]
+            body += b"}"
+        return self._remember(self._pages, key, (body, self.etag(body)), version)
+
+    def get_json(self, key: Hashable, loader: Callable[[], Any]) -> Cached:
+        """Serve any JSON-serializable value, loading it on a miss"""
+        cached, version = self._lookup(self._pages, key)
+        if cached is not None:
+            return cached
+        body = json.dumps(loader(), separators=(",", ":")).encode("utf-8")
+        return self._remember(self._pages, key, (body, self.etag(body)), version)
+
+    def memo(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Cache an intermediate value (e.g. a filtered count) until the next bump"""
+        self._expire()
+        with self._lock:
+            if key in self._values:
+                self._values.move_to_end(key)
+                return self._values[key]
+            version = self.version
+        return self._remember(self._values, key, loader(), version)
+
+    def _remember(self, store: OrderedDict, key: Hashable, value: Any, version: int) -> Any:
+        """Store a value loaded under ``version``; a load that overlapped a bump
+        may hold pre-write data, so it is returned to its caller but not kept"""
+        with self._lock:
+            if version != self.version:
+                return value
+            store[key] = value
+            store.move_to_end(key)
+            limit = self.max_products if store is self._products else self.max_pages
+            while len(store) > limit:
+                store.popitem(last=False)
+        return value
+
+catalog_cache = CatalogCache(ttl_seconds=settings.catalog_cache_ttl_seconds)
@@ -0,0 +1,157 @@
+import hashlib
+import json
+from sqlalchemy import case
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from typing import Any, Collection, Dict, List, Optional, Tuple
+from app.models.product import Product
+from app.schemas.product import ProductCreate
+from app.services.catalog_cache import catalog_cache
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_service import EmbeddingService
+from app.services.search_index import search_index
+from app.services.vector_matrix import vector_matrix, vector_matrix_enabled
+
+
+def catalog_hash(product: Dict[str, Any]) -> str:
+    """Stable hash of the scraped catalog fields of a product"""
+    payload = json.dumps(product, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CatalogSync:
+    """Diff scraped products against the table and apply the changes in bulk.
+
+    Only an ``external_id -> content_hash`` map is loaded; unchanged products
+    are skipped, new and changed ones are written with one
+    ``INSERT ... ON CONFLICT DO UPDATE`` per chunk, and everything (including
+    deletions) commits as a single transaction. With ``sources``, deletions
+    are limited to products of those sources, so a store that failed to
+    crawl keeps its rows.
+    """
+
+    def __init__(self, db: Session, chunk_size: int = 500):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.embedding_service = EmbeddingService()
+
+    def load_hashes(self) -> Dict[str, Tuple[str, Optional[str]]]:
+        """external_id -> (content_hash, source)"""
+        return {
+            external_id: (content_hash, source)
+            for external_id, content_hash, source in self.db.query(
+                Product.external_id, Product.content_hash, Product.source
+            )
+        }
+
+    def sync(self, products: List[Dict[str, Any]], delete_missing: bool = False,
+             sources: Optional[Collection[str]] = None) -> dict:
+        incoming: Dict[str, Dict[str, Any]] = {}
+        for product_data in products:
+            product = ProductCreate(**product_data).model_dump()
+            incoming[product["external_id"]] = product
+        
+        existing = self.load_hashes()
+        inserted, updated, unchanged = [], [], 0
+        rows = []
+        for external_id, product in incoming.items():
+            content_hash = catalog_hash(product)
+            if existing.get(external_id, (None,))[0] == content_hash:
+                unchanged += 1
+                continue
+            (updated if external_id in existing else inserted).append(external_id)
+            rows.append({**product, "content_hash": content_hash})
+        
+        deleted = []
+        if delete_missing:
+            deleted = sorted(
+                external_id for external_id, (_, source) in existing.items()
+                if external_id not in incoming and (sources is None or source in sources)
+            )
+        
+        embeddings_reused = self.attach_cached_embeddings(rows)
+        
+        written = []
+        deleted_ids = []
+        try:
+            for start in range(0, len(rows), self.chunk_size):
+                written.extend(self.upsert_chunk(rows[start:start + self.chunk_size]))
+            if deleted:
+                deleted_ids = [
+                    product_id for (product_id,) in self.db.execute(
+                        Product.__table__.delete()
+                        .where(Product.external_id.in_(deleted))
+                        .returning(Product.id)
+                    )
+                ]
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        matrix_enabled = vector_matrix_enabled()
+        for row in written:
+            search_index.upsert(row)
+            if matrix_enabled:
+                vector_matrix.upsert(row.id, row.embedding)
+        for product_id in deleted_ids:
+            search_index.remove(product_id)
+            if matrix_enabled:
+                vector_matrix.remove(product_id)
+        if written or deleted_ids:
+            catalog_cache.bump()
+        
+        return {
+            "inserted": len(inserted),
+            "updated": len(updated),
+            "unchanged": unchanged,
+            "deleted": len(deleted),
+            "embeddings_reused": embeddings_reused,
+            "inserted_external_ids": inserted,
+            "updated_external_ids": updated,
+            "deleted_external_ids": deleted,
+        }
+
+    def attach_cached_embeddings(self, rows: List[Dict[str, Any]]) -> int:
+        """Fill embedding columns from the content-hash cache in one lookup.
+
+        Rows whose embedding text is unchanged keep their stored vector (see
+        the ON CONFLICT clause); the others get the cached vector or NULL,
+        which queues them for the backfill.
+        """
+        model_name = self.embedding_service.model_name
+        for row in rows:
+            row["embedding_hash"] = self.embedding_service.content_hash(row)
+        cached = EmbeddingCache(self.db).get_many(row["embedding_hash"] for row in rows)
+        for row in rows:
+            embedding = cached.get(row["embedding_hash"])
+            row["embedding"] = embedding
+            row["embedding_model"] = model_name if embedding is not None else None
+        return sum(1 for row in rows if row["embedding"] is not None)
+
+    def upsert_chunk(self, rows: List[Dict[str, Any]]):
+        stmt = insert(Product).values(rows)
+        embedding_current = (
+            (Product.embedding_hash == stmt.excluded.embedding_hash)
+            & Product.embedding.isnot(None)
+            & (Product.embedding_model == self.embedding_service.model_name)
+        )
+        update_columns = {
+            column: getattr(stmt.excluded, column)
+            for column in rows[0]
+            if column not in ("external_id", "embedding", "embedding_model")
+        }
+        update_columns["embedding"] = case(
+            (embedding_current, Product.embedding), else_=stmt.excluded.embedding
+        )
+        update_columns["embedding_model"] = case(
+            (embedding_current, Product.embedding_model), else_=stmt.excluded.embedding_model
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Product.external_id], set_=update_columns
+        )
+        returned = [Product.id, Product.title, Product.description, Product.features, Product.tags]
+        if vector_matrix_enabled():
+            # Only the in-process matrix needs the vectors back
+            returned.append(Product.embedding)
+        return self.db.execute(stmt.returning(*returned)).all()
@@ -0,0 +1,156 @@
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Deque, Iterable, List, Optional, Pattern
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Explicit references back to the products already shown. Bare pronouns
+# ("a shampoo that is sulfate free") are not enough; anything else retrieves
+_FOLLOW_UP_RE = re.compile(
+    r"\b(?:which one|which of (?:these|those|them|the two)|"
+    r"(?:first|second|third|fourth|fifth|last|1st|2nd|3rd|4th|5th) (?:one|product|option)|"
+    r"cheaper|cheapest|more (?:affordable|expensive)|"
+    r"compare (?:them|these|those|both)|difference between (?:them|these|those|the two)|"
+    r"(?:more|tell me) about (?:it|this one|that one|them|these|those)|"
+    r"how (?:do|should|can|often should) i (?:use|apply) (?:it|this|that|them|these|those))\b"
+)
+
+
+@lru_cache(maxsize=8)
+def _keywords_re(keywords: tuple) -> Pattern:
+    """Whole-word match for any of ``keywords`` ("thin" must not match "something")"""
+    alternatives = "|".join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternatives})\b")
+
+
+class ChatSession:
+    __slots__ = ("id", "messages", "summary", "product_ids", "expires_at")
+
+    def __init__(self, session_id: str, max_messages: int, expires_at: float):
+        self.id = session_id
+        self.messages: Deque[dict] = deque(maxlen=max_messages)
+        self.summary = ""
+        self.product_ids: List[int] = []
+        self.expires_at = expires_at
+
+    def history(self) -> List[dict]:
+        return list(self.messages)
+
+
+class ChatSessionStore:
+    """In-process conversation state keyed by session id.
+
+    Each session keeps the last ``max_messages`` messages (truncated to
+    ``message_chars``), a rolling summary of the user's earlier questions
+    that were pushed out of that window, and the product ids of the last
+    retrieval. Sessions expire ``ttl_seconds`` after their last use and the
+    least recently used one is evicted beyond ``max_sessions``, so memory is
+    bounded at roughly max_sessions * max_messages * message_chars.
+    """
+
+    def __init__(self, max_sessions: int, ttl_seconds: int, max_messages: int,
+                 message_chars: int, summary_chars: int):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.message_chars = message_chars
+        self.summary_chars = summary_chars
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, session_id: Optional[str]) -> Optional[ChatSession]:
+        if not session_id:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if session.expires_at <= now:
+                del self._sessions[session_id]
+                self.expirations += 1
+                return None
+            session.expires_at = now + self.ttl_seconds
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def create(self, history: Optional[List[dict]] = None) -> ChatSession:
+        """New session, optionally seeded from a client-sent history"""
+        session = ChatSession(str(uuid.uuid4()), self.max_messages, time.monotonic() + self.ttl_seconds)
+        for message in history or []:
+            self._append(session, message.get("role", "user"), message.get("content", ""))
+        with self._lock:
+            self._sessions[session.id] = session
+            self._evict(time.monotonic())
+        return session
+
+    def get_or_create(self, session_id: Optional[str], history: Optional[List[dict]] = None) -> ChatSession:
+        return self.get(session_id) or self.create(history)
+
+    def record_turn(self, session: ChatSession, query: str, reply: str, product_ids: List[int]) -> None:
+        with self._lock:
+            self._append(session, "user", query)
+            self._append(session, "assistant", reply)
+            session.product_ids = list(product_ids)
+
+    def is_follow_up(self, session: ChatSession, query: str, topic_keywords: Iterable[str]) -> bool:
+        """True when the query explicitly points back at the last products
+        ("which one", "the second one", "cheaper", "how do I use it") and
+        names no new topic"""
+        if not session.product_ids:
+            return False
+        query_lower = query.lower()
+        if _keywords_re(tuple(sorted(topic_keywords))).search(query_lower):
+            return False
+        return bool(_FOLLOW_UP_RE.search(query_lower))
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _append(self, session: ChatSession, role: str, content: str) -> None:
+        if len(session.messages) == session.messages.maxlen:
+            self._summarize(session, session.messages[0])
+        session.messages.append({"role": role, "content": content[:self.message_chars]})
+
+    def _summarize(self, session: ChatSession, message: dict) -> None:
+        """Fold a message leaving the window into the summary (user questions only)"""
+        if message["role"] != "user":
+            return
+        question = message["content"].strip()[:200]
+        summary = f"{session.summary}; {question}" if session.summary else question
+        # Drop the oldest questions when the summary outgrows its budget
+        while len(summary) > self.summary_chars and "; " in summary:
+            summary = summary.split("; ", 1)[1]
+        session.summary = summary[-self.summary_chars:]
+
+    def _evict(self, now: float) -> None:
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if oldest.expires_at <= now:
+                self.expirations += 1
+            elif len(self._sessions) > self.max_sessions:
+                self.evictions += 1
+            else:
+                break
+            del self._sessions[oldest_id]
+
+
+chat_sessions = ChatSessionStore(
+    max_sessions=settings.chat_session_max,
+    ttl_seconds=settings.chat_session_ttl_seconds,
+    max_messages=settings.chat_session_max_messages,
+    message_chars=settings.chat_session_message_chars,
+    summary_chars=settings.chat_session_summary_chars,
+)
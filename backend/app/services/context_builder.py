@@ -0,0 +1,125 @@
+import math
+import re
+from typing import List, Optional, Sequence, Set, Tuple
+
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?;])\s+|\s*[\n•|]+\s*")
+_NORMALIZE_RE = re.compile(r"[^a-z0-9]+")
+
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """Cheap token estimate (~4 chars per token for English); no API round trip"""
+    return math.ceil(len(text) / chars_per_token) if text else 0
+
+
+def truncate_words(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    if " " in cut and not text[limit].isspace():
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,;:-") + "…"
+
+
+class ContextBuilder:
+    """Fits the retrieved products into a token budget for the prompt.
+
+    Products are taken in rank order. Sentences already used by a
+    higher-ranked product (shared boilerplate, repeated benefit lines) are
+    dropped, and each product falls back to progressively shorter variants
+    (full, short description, header only) until it fits the remaining
+    budget. Building stops at the first product whose header doesn't fit.
+    """
+
+    def __init__(
+        self,
+        budget_tokens: int,
+        max_products: int = 5,
+        description_chars: int = 250,
+        features_chars: int = 150,
+        chars_per_token: float = 4.0,
+    ):
+        self.budget_tokens = budget_tokens
+        self.max_products = max_products
+        self.description_chars = description_chars
+        self.features_chars = features_chars
+        self.chars_per_token = chars_per_token
+
+    def tokens(self, text: str) -> int:
+        return estimate_tokens(text, self.chars_per_token)
+
+    def build(self, products: Sequence) -> Tuple[str, List, dict]:
+        """Return ``(context, included_products, stats)``"""
+        if not products:
+            return "No products found.", [], {"context_tokens": 0, "products": 0, "dropped": 0, "trimmed": 0}
+
+        heading = "Available products:\n"
+        remaining = self.budget_tokens - self.tokens(heading)
+        parts = [heading]
+        included = []
+        seen: Set[str] = set()
+        trimmed = 0
+        for product in products[:self.max_products]:
+            number = len(included) + 1
+            block = None
+            for variant, (description_chars, features_chars) in enumerate((
+                (self.description_chars, self.features_chars),
+                (self.description_chars // 2, 0),
+                (0, 0),
+            )):
+                candidate, shown = self._block(product, number, seen, description_chars, features_chars)
+                if self.tokens(candidate) <= remaining:
+                    block = candidate
+                    trimmed += variant > 0
+                    break
+            if block is None:
+                break
+            remaining -= self.tokens(block)
+            parts.append(block)
+            included.append(product)
+            seen |= shown
+
+        context = "\n".join(parts)
+        return context, included, {
+            "context_tokens": self.tokens(context),
+            "products": len(included),
+            "dropped": len(products) - len(included),
+            "trimmed": trimmed,
+        }
+
+    def _block(self, product, number: int, seen: Set[str], description_chars: int,
+               features_chars: int) -> Tuple[str, Set[str]]:
+        """Render one product; also returns the sentence keys it shows"""
+        lines = [
+            f"Product {number}: {product.title}",
+            f"- Price: ₹{product.price}",
+            f"- Category: {product.category or 'Hair Care'}",
+        ]
+        shown: Set[str] = set()
+        description = self._fresh_text(product.description, seen, description_chars, shown)
+        if description:
+            lines.append(f"- Description: {description}")
+        # Features often repeat the description verbatim
+        features = self._fresh_text(product.features, seen | shown, features_chars, shown)
+        if features:
+            lines.append(f"- Key Benefits: {features}")
+        return "\n" + "\n".join(lines) + "\n", shown
+
+    def _fresh_text(self, text: Optional[str], skip: Set[str], limit: int, shown: Set[str]) -> str:
+        """Sentences of ``text`` not in ``skip``, cut to ``limit`` chars"""
+        if not text or limit <= 0:
+            return ""
+        kept, length = [], 0
+        for sentence in _SENTENCE_SPLIT_RE.split(text):
+            key = self._key(sentence)
+            if not key or key in skip or key in shown:
+                continue
+            kept.append(sentence.strip())
+            shown.add(key)
+            length += len(sentence) + 1
+            if length >= limit:
+                break
+        return truncate_words(" ".join(kept), limit)
+
+    @staticmethod
+    def _key(sentence: str) -> str:
+        return _NORMALIZE_RE.sub(" ", sentence.lower()).strip()
@@ -0,0 +1,102 @@
+import os
+import sys
+from typing import List
+import numpy as np
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+class SentenceTransformerBackend:
+    """The original PyTorch model via sentence-transformers (~800MB resident)"""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.name = model_name
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size)
+
+
+class OnnxBackend:
+    """MiniLM exported to ONNX, run on onnxruntime's CPU provider without torch.
+
+    Mean pooling and L2 normalisation reproduce the sentence-transformers
+    Pooling/Normalize modules, so vectors stay 384-dim and cosine-compatible
+    with the ones already stored. With an int8-quantized file, expect a cosine
+    similarity of ~0.99 against the float model.
+    """
+
+    def __init__(self, model_dir: str, model_file: str, max_seq_length: int = 256,
+                 threads: int = 0, low_memory: bool = False):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_seq_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        if low_memory:
+            # Trade some latency for a flat footprint on small instances
+            options.enable_cpu_mem_arena = False
+            options.enable_mem_pattern = False
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.name = backend_model_name()
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size)[0]
+        batches = [self._encode_batch(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+        return np.vstack(batches) if batches else np.empty((0, 384), dtype=np.float32)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def backend_model_name() -> str:
+    """Model identity stored with each embedding; differs per backend and ONNX file
+    so the backfill re-embeds the catalog after a switch"""
+    if settings.embedding_backend == "onnx":
+        variant = os.path.splitext(os.path.basename(settings.onnx_model_file))[0]
+        return f"{settings.local_embedding_model}:onnx:{variant}"
+    return settings.local_embedding_model
+
+
+def load_backend():
+    if settings.embedding_backend == "onnx":
+        return OnnxBackend(
+            settings.onnx_model_dir,
+            settings.onnx_model_file,
+            threads=settings.onnx_threads,
+            low_memory=settings.embedding_low_memory,
+        )
+    return SentenceTransformerBackend(settings.local_embedding_model)
+
+
+def quantize_onnx_model(source: str, target: str) -> None:
+    """Dynamic int8 quantization of an exported float ONNX model"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(source, target, weight_type=QuantType.QInt8)
+
+
+if __name__ == "__main__":
+    # python -m app.services.embedding_backends model.onnx model_int8.onnx
+    quantize_onnx_model(sys.argv[1], sys.argv[2])
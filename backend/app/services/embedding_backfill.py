@@ -0,0 +1,166 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import or_, text
+from sqlalchemy.orm import Session
+from typing import Callable, Dict, List, Optional, Tuple
+from app.core.config import get_settings
+from app.core.rate_limit import TokenBucket
+from app.models.product import Product
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_service import EmbeddingService
+from app.services.vector_matrix import vector_matrix, vector_matrix_enabled
+
+settings = get_settings()
+
+
+def vector_literal(embedding: List[float]) -> str:
+    return "[" + ",".join(repr(float(x)) for x in embedding) + "]"
+
+
+class EmbeddingBackfill:
+    """Embed products that have no embedding for the current model, a chunk at a time.
+
+    Rows are streamed by ascending id (keyset, so the run can resume from
+    ``last_id``), looked up in the content-hash cache, and only the misses
+    are encoded in model-sized batches on a worker thread while the previous
+    chunk is written. Each chunk is stored with a single UPDATE.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        chunk_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        rows_per_second: Optional[float] = None,
+    ):
+        self.db = db
+        self.embedding_service = EmbeddingService()
+        self.cache = EmbeddingCache(db)
+        self.chunk_size = chunk_size or settings.embedding_backfill_chunk_size
+        self.batch_size = batch_size or settings.embedding_batch_size
+        rate = settings.embedding_backfill_rows_per_second if rows_per_second is None else rows_per_second
+        self.rate_limiter = TokenBucket(rate, capacity=max(rate, self.chunk_size))
+
+    def fetch_chunk(self, after_id: int, size: int) -> List[Product]:
+        return self.db.query(
+            Product.id, Product.title, Product.price, Product.category, Product.product_type,
+            Product.description, Product.features, Product.tags
+        ).filter(
+            or_(
+                Product.embedding == None,
+                Product.embedding_model.is_distinct_from(self.embedding_service.model_name)
+            ),
+            Product.id > after_id
+        ).order_by(Product.id).limit(size).all()
+
+    def lookup_chunk(self, rows) -> Tuple[List[str], Dict[str, List[float]]]:
+        hashes = [self.embedding_service.content_hash(row._asdict()) for row in rows]
+        return hashes, self.cache.get_many(hashes)
+
+    def encode_chunk(self, rows, hashes: List[str], cached: Dict[str, List[float]]) -> Dict[str, List[float]]:
+        """Embed the rows whose content hash isn't cached; returns hash -> embedding"""
+        missing = {}
+        for row, content_hash in zip(rows, hashes):
+            if content_hash not in cached and content_hash not in missing:
+                missing[content_hash] = row
+        if not missing:
+            return {}
+        self.rate_limiter.acquire(len(missing))
+        texts = [self.embedding_service.create_product_text(row._asdict()) for row in missing.values()]
+        embeddings = self.embedding_service.generate_embeddings_batch(texts, batch_size=self.batch_size)
+        if len(embeddings) != len(missing):
+            raise RuntimeError("embedding model unavailable")
+        return dict(zip(missing.keys(), embeddings))
+
+    def write_chunk(self, rows, hashes: List[str], embeddings: Dict[str, List[float]]) -> None:
+        values = []
+        params = {"model": self.embedding_service.model_name}
+        for i, (row, content_hash) in enumerate(zip(rows, hashes)):
+            values.append(
+                f"(CAST(:id_{i} AS integer), CAST(:embedding_{i} AS vector), CAST(:hash_{i} AS varchar))"
+            )
+            params[f"id_{i}"] = row.id
+            params[f"embedding_{i}"] = vector_literal(embeddings[content_hash])
+            params[f"hash_{i}"] = content_hash
+        self.db.execute(text(
+            "UPDATE products SET embedding = data.embedding, "
+            "embedding_hash = data.embedding_hash, embedding_model = :model "
+            f"FROM (VALUES {', '.join(values)}) AS data(id, embedding, embedding_hash) "
+            "WHERE products.id = data.id"
+        ), params)
+        self.db.commit()
+        if vector_matrix_enabled():
+            for row, content_hash in zip(rows, hashes):
+                vector_matrix.upsert(row.id, embeddings[content_hash])
+
+    def run(
+        self,
+        limit: Optional[int] = None,
+        start_after_id: int = 0,
+        on_chunk: Optional[Callable[[dict], None]] = None,
+    ) -> dict:
+        """Backfill up to ``limit`` rows after ``start_after_id``.
+
+        ``on_chunk`` is called after every written chunk with the running
+        totals, e.g. to report job progress.
+        """
+        started = time.perf_counter()
+        generated = 0
+        cache_hits = 0
+        errors = 0
+        last_id = start_after_id
+        cursor = start_after_id
+        fetched = 0
+
+        def next_chunk():
+            nonlocal cursor, fetched
+            size = self.chunk_size if limit is None else min(self.chunk_size, limit - fetched)
+            rows = self.fetch_chunk(cursor, size) if size > 0 else []
+            if rows:
+                cursor = rows[-1].id
+                fetched += len(rows)
+            return rows
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-backfill") as executor:
+            rows = next_chunk()
+            pending = None
+            while rows or pending:
+                current = None
+                if rows:
+                    hashes, cached = self.lookup_chunk(rows)
+                    current = (rows, hashes, cached, executor.submit(self.encode_chunk, rows, hashes, cached))
+                if pending:
+                    pending_rows, pending_hashes, pending_cached, pending_future = pending
+                    try:
+                        encoded = pending_future.result()
+                        self.cache.put_many(self.embedding_service.model_name, encoded)
+                        self.write_chunk(pending_rows, pending_hashes, {**pending_cached, **encoded})
+                        generated += len(pending_rows)
+                        cache_hits += sum(1 for h in pending_hashes if h in pending_cached)
+                    except Exception as e:
+                        self.db.rollback()
+                        errors += len(pending_rows)
+                        print(f"Error embedding products {pending_rows[0].id}-{pending_rows[-1].id}: {e}")
+                    last_id = pending_rows[-1].id
+                    if on_chunk:
+                        on_chunk({"embeddings_generated": generated, "errors": errors, "last_id": last_id})
+                pending = current
+                rows = next_chunk() if rows else []
+
+        elapsed = time.perf_counter() - started
+        return {
+            "embeddings_generated": generated,
+            "cache_hits": cache_hits,
+            "errors": errors,
+            "last_id": last_id,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(generated / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+    def remaining(self) -> int:
+        return self.db.query(Product).filter(
+            or_(
+                Product.embedding == None,
+                Product.embedding_model.is_distinct_from(self.embedding_service.model_name)
+            )
+        ).count()
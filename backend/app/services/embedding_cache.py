@@ -0,0 +1,31 @@
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List
+from app.models.embedding_cache import EmbeddingCacheEntry
+
+
+class EmbeddingCache:
+    """Persistent embeddings keyed by EmbeddingService.content_hash (text + model)"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_many(self, content_hashes: Iterable[str]) -> Dict[str, List[float]]:
+        content_hashes = list(set(content_hashes))
+        if not content_hashes:
+            return {}
+        rows = self.db.query(EmbeddingCacheEntry.content_hash, EmbeddingCacheEntry.embedding).filter(
+            EmbeddingCacheEntry.content_hash.in_(content_hashes)
+        ).all()
+        return {row.content_hash: row.embedding for row in rows}
+
+    def put_many(self, model: str, entries: Dict[str, List[float]]) -> None:
+        """Insert new entries; callers commit together with their own writes"""
+        if not entries:
+            return
+        self.db.execute(
+            insert(EmbeddingCacheEntry).values([
+                {"content_hash": content_hash, "model": model, "embedding": embedding}
+                for content_hash, embedding in entries.items()
+            ]).on_conflict_do_nothing(index_elements=["content_hash"])
+        )
@@ -1,8 +1,19 @@
 from typing import List, Optional
+import hashlib
 import os
+import resource
+import statistics
+import threading
+import time
+from app.core.config import get_settings
+from app.services.embedding_backends import backend_model_name, load_backend
+
+settings = get_settings()
 
 _model = None
 _model_failed = False
+_model_lock = threading.Lock()
+warmup_report: Optional[dict] = None
 
 
 def get_model():
@@ -10,20 +21,84 @@ def get_model():
     if _model_failed:
         return None
     if _model is None:
-        try:
-            from sentence_transformers import SentenceTransformer
-            _model = SentenceTransformer('all-MiniLM-L6-v2')
-        except Exception as e:
-            print(f"Failed to load embedding model: {e}")
-            _model_failed = True
-            return None
+        with _model_lock:
+            if _model is None and not _model_failed:
+                try:
+                    _model = load_backend()
+                except Exception as e:
+                    print(f"Failed to load embedding model: {e}")
+                    _model_failed = True
     return _model
 
 
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def warmup(samples: int = 20) -> Optional[dict]:
+    """Load the embedding backend before serving and report its cost.
+
+    Called from the app lifespan so the model load and the first (slow)
+    inference don't land on a user's request.
+    """
+    global warmup_report
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    model = get_model()
+    if model is None:
+        return None
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    model.encode("warmup query")
+    first_ms = (time.perf_counter() - started) * 1000
+
+    timings = []
+    for i in range(samples):
+        started = time.perf_counter()
+        model.encode(f"dry scalp and hair fall {i}")
+        timings.append((time.perf_counter() - started) * 1000)
+
+    batch = [f"Product: sample {i} | Category: Hair Care" for i in range(settings.embedding_batch_size)]
+    started = time.perf_counter()
+    model.encode(batch, batch_size=settings.embedding_batch_size)
+    batch_ms = (time.perf_counter() - started) * 1000
+
+    warmup_report = {
+        "backend": settings.embedding_backend,
+        "model": backend_model_name(),
+        "load_seconds": round(load_seconds, 2),
+        "rss_mb": round(_rss_mb(), 1),
+        "rss_delta_mb": round(_rss_mb() - rss_before, 1),
+        "first_query_ms": round(first_ms, 2),
+        "query_p50_ms": round(statistics.median(timings), 2),
+        "query_max_ms": round(max(timings), 2),
+        "batch_ms_per_text": round(batch_ms / len(batch), 2),
+    }
+    print(f"Embedding warmup: {warmup_report}")
+    return warmup_report
+
+
 class EmbeddingService:
     def __init__(self):
         pass
+
+    @property
+    def model_name(self) -> str:
+        return backend_model_name()
     
+    def content_hash(self, product: dict) -> str:
+        """Cache key for a product's embedding: changes with its text or the model"""
+        product_text = self.create_product_text(product)
+        return hashlib.sha256(f"{self.model_name}\0{product_text}".encode("utf-8")).hexdigest()
+
     def create_product_text(self, product: dict) -> str:
         parts = [
             f"Product: {product.get('title', '')}",
@@ -59,9 +134,9 @@ class EmbeddingService:
         embedding = model.encode(query)
         return embedding.tolist()
 
-    def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    def generate_embeddings_batch(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
         model = get_model()
         if model is None:
             return []
-        embeddings = model.encode(texts)
+        embeddings = model.encode(texts, batch_size=batch_size)
         return [e.tolist() for e in embeddings]
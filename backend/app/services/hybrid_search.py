@@ -0,0 +1,77 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+Hits = List[Tuple[int, float]]
+
+
+class LegResult:
+    __slots__ = ("name", "hits", "elapsed_ms", "timed_out", "error")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits: Hits = []
+        self.elapsed_ms = 0.0
+        self.timed_out = False
+        self.error: Optional[str] = None
+
+
+async def _run_leg(name: str, fn: Callable[[], Awaitable[Hits]], budget_ms: float) -> LegResult:
+    result = LegResult(name)
+    start = time.perf_counter()
+    try:
+        result.hits = await asyncio.wait_for(fn(), timeout=budget_ms / 1000)
+    except asyncio.TimeoutError:
+        result.timed_out = True
+    except Exception as e:
+        result.error = str(e)
+    result.elapsed_ms = (time.perf_counter() - start) * 1000
+    return result
+
+
+async def run_legs(legs: Dict[str, Tuple[Callable[[], Awaitable[Hits]], float]]) -> Dict[str, LegResult]:
+    """Run candidate generators concurrently, each bounded by its own timeout (ms).
+
+    A leg that times out is cancelled; it, and a leg that raises,
+    contributes no hits while the others are still used.
+    """
+    results = await asyncio.gather(*(
+        _run_leg(name, fn, budget_ms) for name, (fn, budget_ms) in legs.items()
+    ))
+    return {result.name: result for result in results}
+
+
+def reciprocal_rank_fusion(
+    rankings: Dict[str, Hits], weights: Dict[str, float], k: int = 60
+) -> List[Tuple[int, float]]:
+    fused: Dict[int, float] = {}
+    for name, hits in rankings.items():
+        weight = weights.get(name, 1.0)
+        for rank, (product_id, _) in enumerate(hits, 1):
+            fused[product_id] = fused.get(product_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def weighted_score_fusion(
+    rankings: Dict[str, Hits], weights: Dict[str, float]
+) -> List[Tuple[int, float]]:
+    """Blend min-max normalised leg scores; legs must report higher-is-better scores.
+
+    Min-max keeps each leg's order whatever its range, e.g. cosine
+    similarities below zero. A leg whose hits all score the same gives each 1.0.
+    """
+    fused: Dict[int, float] = {}
+    for name, hits in rankings.items():
+        if not hits:
+            continue
+        low = min(score for _, score in hits)
+        spread = max(score for _, score in hits) - low
+        weight = weights.get(name, 1.0)
+        for product_id, score in hits:
+            normalised = (score - low) / spread if spread else 1.0
+            fused[product_id] = fused.get(product_id, 0.0) + weight * normalised
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def overlap(first: Sequence[Tuple[int, float]], second: Sequence[Tuple[int, float]]) -> int:
+    return len({pid for pid, _ in first} & {pid for pid, _ in second})
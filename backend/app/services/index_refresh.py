@@ -0,0 +1,41 @@
+import asyncio
+import time
+from typing import Optional
+from app.core.database import AsyncSessionLocal
+
+
+class IndexRefresher:
+    """Single-flight (re)loading for an in-process index.
+
+    The first load is awaited, with concurrent callers waiting on the same
+    load. Once built, a stale index keeps being served while one background
+    task reloads it on its own session, so no request pays for the rebuild.
+    The index needs ``built_at`` and ``rebuild_async(db)``.
+    """
+
+    def __init__(self, index, name: str):
+        self.index = index
+        self.name = name
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def is_stale(self, max_age_seconds: int) -> bool:
+        built_at = self.index.built_at
+        return bool(max_age_seconds) and built_at is not None and time.monotonic() - built_at > max_age_seconds
+
+    async def ensure(self, db, max_age_seconds: int = 0):
+        if self.index.built_at is None:
+            async with self._lock:
+                if self.index.built_at is None:
+                    await self.index.rebuild_async(db)
+        elif self.is_stale(max_age_seconds) and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._refresh())
+        return self.index
+
+    async def _refresh(self) -> None:
+        async with self._lock:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.index.rebuild_async(db)
+            except Exception as e:
+                print(f"Background {self.name} refresh failed: {e}")
@@ -0,0 +1,230 @@
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.core.config import get_settings
+from app.core.database import SessionLocal
+from app.models.job import Job
+
+settings = get_settings()
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobContext:
+    """Handed to job handlers to report progress and a resume checkpoint.
+
+    Updates are written through their own session, throttled to one write per
+    ``min_interval`` seconds, and double as the job's heartbeat.
+    """
+
+    def __init__(self, job_id: str, min_interval: float = 1.0):
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self._last_write = 0.0
+
+    def progress(
+        self,
+        processed: int,
+        total: Optional[int] = None,
+        errors: int = 0,
+        checkpoint: Optional[Dict[str, Any]] = None,
+        force: bool = False,
+    ) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_write < self.min_interval:
+            return
+        self._last_write = now
+        values = {"processed": processed, "errors": errors, "updated_at": _now()}
+        if total is not None:
+            values["total"] = total
+        if checkpoint is not None:
+            values["checkpoint"] = checkpoint
+        with SessionLocal() as db:
+            db.query(Job).filter(Job.id == self.job_id).update(values)
+            db.commit()
+
+
+Handler = Callable[[JobContext, Session, Dict[str, Any]], Dict[str, Any]]
+
+
+class JobRunner:
+    """Local queue + worker threads for long-running jobs, with state in Postgres.
+
+    At most one queued/running job per type exists (enforced by a partial
+    unique index), so a second submission returns the active job. Claimed
+    jobs record the runner's ``owner_id``; a monitor thread refreshes their
+    heartbeat independently of the handler, and any process's monitor
+    requeues running jobs whose heartbeat went stale (the owner died) and
+    queued jobs nobody picked up, so a restart never leaves a job stuck.
+    """
+
+    def __init__(self, handlers: Dict[str, Handler], workers: int = None):
+        self.handlers = handlers
+        self.workers = workers or settings.job_workers
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.resume_unfinished()
+        monitor = threading.Thread(target=self._monitor, name="job-monitor", daemon=True)
+        monitor.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        for _ in self._threads:
+            self._queue.put(None)
+        self._threads = []
+
+    def submit(self, job_type: str, params: Optional[Dict[str, Any]] = None) -> Tuple[Job, bool]:
+        """Queue a job; returns ``(job, deduplicated)``"""
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        with SessionLocal() as db:
+            active = self._active_job(db, job_type)
+            if active:
+                return active, True
+            job = Job(id=str(uuid.uuid4()), job_type=job_type, status="queued", params=params or {})
+            db.add(job)
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                return self._active_job(db, job_type), True
+            db.refresh(job)
+            db.expunge(job)
+        self._queue.put(job.id)
+        return job, False
+
+    def resume_unfinished(self, queued_before: Optional[datetime] = None) -> int:
+        """Requeue running jobs with a stale heartbeat and enqueue queued ones.
+
+        On start every queued job is enqueued; the monitor passes
+        ``queued_before`` so it only picks up jobs that sat queued for a
+        while (e.g. submitted by a process that then died). ``_claim`` makes
+        sure a job enqueued in several processes still runs once.
+        """
+        stale_before = _now() - timedelta(seconds=settings.job_stale_seconds)
+        with SessionLocal() as db:
+            db.query(Job).filter(
+                Job.status == "running", Job.updated_at < stale_before
+            ).update({"status": "queued", "owner": None, "updated_at": _now()}, synchronize_session=False)
+            db.commit()
+            query = db.query(Job.id).filter(Job.status == "queued")
+            if queued_before is not None:
+                query = query.filter(Job.updated_at < queued_before)
+            job_ids = [job_id for (job_id,) in query.all()]
+            if job_ids:
+                # Restart the clock so the monitor doesn't enqueue them again next tick
+                db.query(Job).filter(Job.id.in_(job_ids), Job.status == "queued").update(
+                    {"updated_at": _now()}, synchronize_session=False
+                )
+                db.commit()
+        for job_id in job_ids:
+            self._queue.put(job_id)
+        if job_ids:
+            print(f"Resuming {len(job_ids)} unfinished job(s)")
+        return len(job_ids)
+
+    def heartbeat(self) -> None:
+        """Mark this runner's running jobs as alive, whatever their handlers report"""
+        with SessionLocal() as db:
+            db.query(Job).filter(Job.status == "running", Job.owner == self.owner_id).update(
+                {"updated_at": _now()}, synchronize_session=False
+            )
+            db.commit()
+
+    def _monitor(self) -> None:
+        while not self._stopping.wait(settings.job_heartbeat_seconds):
+            try:
+                self.heartbeat()
+                self.resume_unfinished(queued_before=_now() - timedelta(seconds=settings.job_stale_seconds))
+            except Exception as e:
+                print(f"Job monitor error: {e}")
+
+    def _active_job(self, db: Session, job_type: str) -> Optional[Job]:
+        job = db.query(Job).filter(
+            Job.job_type == job_type, Job.status.in_(ACTIVE_STATUSES)
+        ).first()
+        if job:
+            db.expunge(job)
+        return job
+
+    def _claim(self, db: Session, job_id: str) -> Optional[Job]:
+        """Move a queued job to running; another worker or process may have won the race"""
+        claimed = db.query(Job).filter(Job.id == job_id, Job.status == "queued").update(
+            {"status": "running", "owner": self.owner_id, "started_at": _now(), "updated_at": _now()},
+            synchronize_session=False
+        )
+        db.commit()
+        return db.get(Job, job_id) if claimed else None
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            try:
+                self._run(job_id)
+            except Exception as e:
+                print(f"Job worker error for {job_id}: {e}")
+
+    def _run(self, job_id: str) -> None:
+        with SessionLocal() as db:
+            job = self._claim(db, job_id)
+            if job is None:
+                return
+            params = {**(job.params or {}), **(job.checkpoint or {})}
+            handler = self.handlers[job.job_type]
+            context = JobContext(job_id)
+            try:
+                result = handler(context, db, params)
+                status, error_message = "succeeded", None
+            except Exception as e:
+                db.rollback()
+                result, status, error_message = None, "failed", str(e)
+                print(f"Job {job_id} ({job.job_type}) failed: {e}")
+            db.query(Job).filter(Job.id == job_id).update({
+                "status": status,
+                "result": result,
+                "error_message": error_message,
+                "finished_at": _now(),
+                "updated_at": _now(),
+            }, synchronize_session=False)
+            db.commit()
+
+
+def describe_job(job: Job) -> Dict[str, Any]:
+    """Job fields plus throughput and ETA derived from its progress"""
+    data = {column.name: getattr(job, column.name) for column in Job.__table__.columns}
+    throughput = None
+    eta = None
+    if job.started_at and job.processed:
+        end = job.finished_at or _now()
+        elapsed = (end - job.started_at).total_seconds()
+        if elapsed > 0:
+            throughput = round(job.processed / elapsed, 2)
+            if job.status == "running" and job.total:
+                eta = round(max(job.total - job.processed, 0) / throughput, 1)
+    data["throughput_per_second"] = throughput
+    data["eta_seconds"] = eta
+    return data
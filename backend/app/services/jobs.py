@@ -0,0 +1,73 @@
+import asyncio
+from sqlalchemy.orm import Session
+from typing import Any, Dict
+from app.core.config import get_settings
+from app.scraper.scheduler import CrawlScheduler
+from app.services.catalog_sync import CatalogSync
+from app.services.embedding_backfill import EmbeddingBackfill
+from app.services.job_runner import JobContext, JobRunner
+
+settings = get_settings()
+
+
+def run_scrape_job(context: JobContext, db: Session, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Crawl the configured stores and sync them.
+
+    Deletions only apply to stores whose crawl paged through to the end.
+    """
+    names = params.get("stores") or list(settings.scraper_stores)
+    unknown = [name for name in names if name not in settings.scraper_stores]
+    if unknown:
+        raise ValueError(f"Unknown stores: {', '.join(unknown)}")
+    stores = {name: settings.scraper_stores[name] for name in names}
+
+    # Progress doubles as the heartbeat, so a long crawl isn't taken for dead
+    crawl = asyncio.run(CrawlScheduler(stores, on_progress=context.progress).crawl())
+    products, sources = crawl["products"], crawl["sources"]
+    complete_sources = [name for name, stats in sources.items() if stats["complete"]]
+    context.progress(0, total=len(products), force=True)
+    summary = CatalogSync(db).sync(products, delete_missing=bool(complete_sources), sources=complete_sources)
+    context.progress(len(products), total=len(products), force=True)
+    return {
+        "products_count": len(products),
+        "complete": len(complete_sources) == len(stores),
+        "sources": sources,
+        **summary,
+    }
+
+
+def run_embedding_job(context: JobContext, db: Session, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Embedding backfill; the checkpoint lets a restarted job continue after last_id"""
+    backfill = EmbeddingBackfill(db)
+    limit = params.get("limit")
+    start_after_id = params.get("start_after_id", 0)
+    done_before = params.get("processed_before", 0)
+    remaining = backfill.remaining()
+    total = done_before + (min(limit, remaining) if limit is not None else remaining)
+    context.progress(done_before, total=total, force=True)
+
+    def on_chunk(stats: dict):
+        processed = stats["embeddings_generated"] + stats["errors"]
+        context.progress(
+            done_before + processed,
+            errors=stats["errors"],
+            checkpoint={
+                "start_after_id": stats["last_id"],
+                "limit": limit - processed if limit is not None else None,
+                "processed_before": done_before + processed,
+            },
+        )
+
+    result = backfill.run(limit=limit, start_after_id=start_after_id, on_chunk=on_chunk)
+    context.progress(
+        done_before + result["embeddings_generated"] + result["errors"],
+        errors=result["errors"],
+        force=True,
+    )
+    return {**result, "remaining": backfill.remaining()}
+
+
+job_runner = JobRunner({
+    "scrape": run_scrape_job,
+    "embeddings": run_embedding_job,
+})
@@ -1,9 +1,108 @@
+import base64
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Optional
-from app.models.product import Product
-from app.schemas.product import ProductCreate
+from sqlalchemy import String, and_, case, cast, func, literal, literal_column, select, union_all
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Tuple
+from app.core import schema
+from app.core.config import get_settings
+from app.models.product import RESPONSE_COLUMNS, Product
+from app.schemas.product import ProductCreate, ProductFilters
+from app.services.catalog_cache import catalog_cache
+from app.services.catalog_sync import catalog_hash
+from app.services.embedding_backfill import EmbeddingBackfill
+from app.services.embedding_cache import EmbeddingCache
 from app.services.embedding_service import EmbeddingService
+from app.services.search_index import search_index
+from app.services.vector_matrix import vector_matrix, vector_matrix_enabled
+
+settings = get_settings()
+
+FACET_COLUMNS = ("category", "product_type", "vendor", "source")
+
+
+def encode_cursor(product_id: int) -> str:
+    return base64.urlsafe_b64encode(str(product_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def filter_conditions(filters: ProductFilters) -> Dict[str, object]:
+    """One SQL condition per filter field, keyed by facet name"""
+    conditions = {}
+    for name in FACET_COLUMNS:
+        values = getattr(filters, name)
+        if values:
+            conditions[name] = getattr(Product, name).in_(values)
+    if filters.tags:
+        # && (overlap) is served by the GIN index on tags
+        conditions["tags"] = Product.tags.op("&&")(cast(filters.tags, Product.tags.type))
+    price = []
+    if filters.min_price is not None:
+        price.append(Product.price >= filters.min_price)
+    if filters.max_price is not None:
+        price.append(Product.price <= filters.max_price)
+    if price:
+        conditions["price"] = and_(*price)
+    return conditions
+
+
+def price_buckets() -> List[Tuple[Optional[float], str]]:
+    """(exclusive upper bound, label) pairs from settings.price_facet_buckets"""
+    bounds = sorted(settings.price_facet_buckets)
+    buckets, lower = [], 0
+    for upper in bounds:
+        buckets.append((upper, f"{lower:g}-{upper:g}"))
+        lower = upper
+    buckets.append((None, f"{lower:g}+"))
+    return buckets
+
+
+def search_statement(query: str, limit: int):
+    tsquery = func.websearch_to_tsquery(cast(settings.text_search_config, REGCONFIG), query)
+    return select(*RESPONSE_COLUMNS).where(
+        Product.search_vector.op("@@")(tsquery)
+    ).order_by(
+        func.ts_rank(Product.search_vector, tsquery).desc(), Product.id
+    ).limit(limit)
+
+
+def use_fuzzy(fuzzy: Optional[bool]) -> bool:
+    if not schema.trigram_available:
+        return False
+    return settings.search_fuzzy if fuzzy is None else fuzzy
+
+
+def fuzzy_threshold_statement():
+    # Transaction-local, so it can't leak to other requests through the pool
+    return select(func.set_config(
+        "pg_trgm.word_similarity_threshold", str(settings.search_fuzzy_threshold), True
+    ))
+
+
+def fuzzy_statement(query: str, limit: int, found: List[Row]):
+    return select(*RESPONSE_COLUMNS).where(
+        literal(query).op("<%")(Product.title),
+        Product.id.notin_([p.id for p in found])
+    ).order_by(
+        func.word_similarity(query, Product.title).desc(), Product.id
+    ).limit(limit)
+
+
+async def search_products_async(db: AsyncSession, query: str, limit: int = 20,
+                                fuzzy: Optional[bool] = None) -> List[Row]:
+    """ProductService.search_products on the async engine"""
+    products = list(await db.execute(search_statement(query, limit)))
+    if use_fuzzy(fuzzy) and len(products) < limit:
+        await db.execute(fuzzy_threshold_statement())
+        products += await db.execute(fuzzy_statement(query, limit - len(products), products))
+    return products
 
 
 class ProductService:
@@ -12,57 +111,171 @@ class ProductService:
         self.embedding_service = EmbeddingService()
 
     def get_all_products(self, skip: int = 0, limit: int = 100) -> List[Product]:
-        return self.db.query(Product).offset(skip).limit(limit).all()
+        return self.db.query(Product).order_by(Product.id).offset(skip).limit(limit).all()
+
+    def list_products(
+        self,
+        filters: ProductFilters,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        skip: int = 0
+    ) -> Tuple[List[Row], Optional[str]]:
+        """Keyset page ordered by id; returns (product rows, next_cursor).
+
+        ``skip`` is only honoured without a cursor, for older clients.
+        Raises ValueError for a malformed cursor.
+        """
+        query = select(*RESPONSE_COLUMNS).where(*filter_conditions(filters).values())
+        if cursor:
+            query = query.where(Product.id > decode_cursor(cursor))
+        elif skip:
+            query = query.offset(skip)
+        products = self.db.execute(query.order_by(Product.id).limit(limit + 1)).all()
+        if len(products) > limit:
+            return products[:limit], encode_cursor(products[limit - 1].id)
+        return products, None
+
+    def count_products(self, filters: ProductFilters) -> int:
+        return self.db.query(func.count(Product.id)).filter(*filter_conditions(filters).values()).scalar()
+
+    def get_facets(self, filters: ProductFilters) -> dict:
+        """Facet counts for category, product_type, vendor, source, tags and price in one query.
+
+        Each facet is counted with every filter except its own, so the
+        alternatives to a selected value keep their counts. The branches are
+        combined with UNION ALL into a single round trip.
+        """
+        conditions = filter_conditions(filters)
+
+        def others(facet: str):
+            return [condition for name, condition in conditions.items() if name != facet]
+
+        def label(facet: str):
+            return literal_column(f"'{facet}'").label("facet")
+
+        branches = []
+        for name in FACET_COLUMNS:
+            column = getattr(Product, name)
+            branches.append(
+                select(label(name), cast(column, String).label("value"), func.count().label("count"))
+                .where(column.isnot(None), *others(name))
+                .group_by(column)
+            )
+
+        tags = select(func.unnest(Product.tags).label("value")).where(*others("tags")).subquery()
+        branches.append(
+            select(label("tags"), cast(tags.c.value, String), func.count()).group_by(tags.c.value)
+        )
+
+        buckets = price_buckets()
+        bucket = case(
+            *[(Product.price < upper, name) for upper, name in buckets if upper is not None],
+            else_=buckets[-1][1]
+        )
+        branches.append(
+            select(label("price"), bucket, func.count()).where(*others("price")).group_by(bucket)
+        )
+        branches.append(
+            select(label("total"), cast(None, String), func.count()).select_from(Product)
+            .where(*conditions.values())
+        )
+
+        facets: Dict[str, List[dict]] = {name: [] for name in (*FACET_COLUMNS, "tags", "price")}
+        total = 0
+        for facet, value, count in self.db.execute(union_all(*branches)).all():
+            if facet == "total":
+                total = count
+            else:
+                facets[facet].append({"value": value, "count": count})
+        for name, values in facets.items():
+            if name == "price":
+                order = {bucket_name: i for i, (_, bucket_name) in enumerate(buckets)}
+                values.sort(key=lambda item: order[item["value"]])
+            else:
+                values.sort(key=lambda item: (-item["count"], item["value"]))
+        return {"total": total, "facets": facets}
 
     def get_product_by_id(self, product_id: int) -> Optional[Product]:
         return self.db.query(Product).filter(Product.id == product_id).first()
 
+    def get_product_row(self, product_id: int) -> Optional[Row]:
+        """Response columns only, for read endpoints"""
+        return self.db.execute(select(*RESPONSE_COLUMNS).where(Product.id == product_id)).first()
+
     def get_product_by_external_id(self, external_id: str) -> Optional[Product]:
         return self.db.query(Product).filter(Product.external_id == external_id).first()
 
-    def search_products(self, query: str, limit: int = 20) -> List[Product]:
-        search_term = f"%{query}%"
-        return self.db.query(Product).filter(
-            or_(
-                Product.title.ilike(search_term),
-                Product.description.ilike(search_term),
-                Product.category.ilike(search_term)
-            )
-        ).limit(limit).all()
+    def search_products(self, query: str, limit: int = 20, fuzzy: Optional[bool] = None) -> List[Row]:
+        """Full-text search over search_vector, ranked by ts_rank.
+
+        ``query`` uses websearch syntax ("quoted phrases", -exclusions, or).
+        When fuzzy matching is on and the full-text hits don't fill ``limit``,
+        titles are matched by trigram word similarity so typos still find
+        something; those results rank after the full-text ones.
+        """
+        products = list(self.db.execute(search_statement(query, limit)))
+        if use_fuzzy(fuzzy) and len(products) < limit:
+            self.db.execute(fuzzy_threshold_statement())
+            products += self.db.execute(fuzzy_statement(query, limit - len(products), products))
+        return products
 
     def create_product(self, product_data: ProductCreate) -> Product:
         existing = self.get_product_by_external_id(product_data.external_id)
         if existing:
             for key, value in product_data.model_dump().items():
                 setattr(existing, key, value)
+            existing.content_hash = catalog_hash(product_data.model_dump())
+            self.apply_cached_embedding(existing)
             self.db.commit()
             self.db.refresh(existing)
+            search_index.upsert(existing)
+            if vector_matrix_enabled():
+                vector_matrix.upsert(existing.id, existing.embedding)
+            catalog_cache.bump()
             return existing
         
-        product = Product(**product_data.model_dump())
+        product = Product(**product_data.model_dump(), content_hash=catalog_hash(product_data.model_dump()))
+        self.apply_cached_embedding(product)
         self.db.add(product)
         self.db.commit()
         self.db.refresh(product)
+        search_index.upsert(product)
+        if vector_matrix_enabled():
+            vector_matrix.upsert(product.id, product.embedding)
+        catalog_cache.bump()
         return product
 
+    def apply_cached_embedding(self, product: Product) -> None:
+        """Keep the embedding only while it matches the product text and model.
+
+        Changed text is looked up in the embedding cache first; on a miss the
+        embedding is cleared so the backfill picks the product up.
+        """
+        content_hash = self.embedding_service.content_hash(product.to_dict())
+        if content_hash == product.embedding_hash and product.embedding is not None:
+            return
+        cached = EmbeddingCache(self.db).get_many([content_hash]).get(content_hash)
+        product.embedding = cached
+        product.embedding_hash = content_hash if cached is not None else None
+        product.embedding_model = self.embedding_service.model_name if cached is not None else None
+
     def generate_and_store_embedding(self, product: Product) -> Product:
         product_text = self.embedding_service.create_product_text(product.to_dict())
         embedding = self.embedding_service.generate_embedding(product_text)
         product.embedding = embedding
+        if embedding is not None:
+            content_hash = self.embedding_service.content_hash(product.to_dict())
+            product.embedding_hash = content_hash
+            product.embedding_model = self.embedding_service.model_name
+            EmbeddingCache(self.db).put_many(self.embedding_service.model_name, {content_hash: embedding})
         self.db.commit()
         self.db.refresh(product)
+        if vector_matrix_enabled():
+            vector_matrix.upsert(product.id, product.embedding)
         return product
 
     def generate_embeddings_for_all(self) -> int:
-        products = self.db.query(Product).filter(Product.embedding == None).all()
-        count = 0
-        for product in products:
-            try:
-                self.generate_and_store_embedding(product)
-                count += 1
-            except Exception as e:
-                print(f"Error generating embedding for product {product.id}: {e}")
-        return count
+        return EmbeddingBackfill(self.db).run()["embeddings_generated"]
 
     def get_products_count(self) -> int:
         return self.db.query(Product).count()
@@ -0,0 +1,87 @@
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple
+from app.core.config import get_settings
+from app.services.embedding_service import EmbeddingService
+
+settings = get_settings()
+
+
+class QueryEmbedder:
+    """Coalesces concurrent query embeddings into batched encode calls.
+
+    The first waiting query opens a window of ``max_wait_ms`` (closed early
+    once ``max_batch`` queries are queued); the batch is encoded in one call
+    on a worker thread and each caller's future gets its own vector.
+    Duplicate queries within a batch are encoded once.
+    """
+
+    def __init__(self, encode_batch: Callable[[List[str]], List[List[float]]],
+                 max_batch: int = 16, max_wait_ms: float = 3.0):
+        self.encode_batch = encode_batch
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._queue: Optional["asyncio.Queue[Tuple[str, asyncio.Future]]"] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.batches = 0
+        self.items = 0
+
+    async def embed(self, query: str) -> Optional[List[float]]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        await self._queue.put((query, future))
+        return await future
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._encode(batch)
+
+    async def _encode(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = list(dict.fromkeys(query for query, _ in batch))
+        try:
+            embeddings = await asyncio.to_thread(self.encode_batch, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        by_text: Dict[str, Optional[List[float]]] = dict(zip(texts, embeddings or [None] * len(texts)))
+        self.batches += 1
+        self.items += len(batch)
+        for query, future in batch:
+            # The caller may have been cancelled (e.g. a hybrid leg timeout)
+            if not future.done():
+                future.set_result(by_text.get(query))
+
+
+def _encode_queries(texts: List[str]) -> List[List[float]]:
+    return EmbeddingService().generate_embeddings_batch(texts, batch_size=len(texts))
+
+
+query_embedder = QueryEmbedder(
+    _encode_queries,
+    max_batch=settings.query_embed_max_batch,
+    max_wait_ms=settings.query_embed_max_wait_ms,
+)
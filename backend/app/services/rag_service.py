@@ -1,135 +1,404 @@
+import asyncio
 import google.generativeai as genai
-from sqlalchemy.orm import Session
-from typing import List, Tuple
+import time
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
 from app.core.config import get_settings
-from app.models.product import Product
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import registry
+from app.core.tracing import record, span
+from app.models.product import RESPONSE_COLUMNS, Product
+from app.services.chat_sessions import ChatSession, chat_sessions
+from app.services.context_builder import ContextBuilder, estimate_tokens
+from app.services.embedding_service import EmbeddingService
+from app.services.hybrid_search import (
+    overlap, reciprocal_rank_fusion, run_legs, weighted_score_fusion
+)
+from app.services.query_embedder import query_embedder
+from app.services.response_cache import ResponseCache, history_digest
+from app.services.search_index import ProductSearchIndex, get_search_index
+from app.services.vector_search import VectorSearch
 
 settings = get_settings()
 
+HYBRID_LEG_DURATION = registry.histogram(
+    "hybrid_leg_duration_seconds", "Latency of each hybrid retrieval leg", ("leg",)
+)
+HYBRID_OVERLAP = registry.histogram(
+    "hybrid_leg_overlap_ratio", "Share of top-k hits both legs returned",
+    buckets=(0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+)
+PROMPT_TOKENS = registry.histogram(
+    "chat_prompt_tokens", "Estimated prompt tokens per chat turn, by part", ("part",),
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+)
+# (leg, "timeout" | "error") -> legs that returned no hits for that reason
+hybrid_leg_failures: Dict[Tuple[str, str], int] = {}
+
+# Bump whenever SYSTEM_PROMPT, TURN_PROMPT or the context builder changes so
+# cached answers expire
+PROMPT_VERSION = "2"
+
+SYSTEM_PROMPT = """You are Mane's shopping assistant for hair care products.
+
+IMPORTANT RULES:
+1. ONLY recommend products from the product list in the latest message - do not mention products not in the list
+2. When recommending, use the EXACT product names from the list
+3. Be helpful and explain why each product helps with the user's concern
+4. If unsure what the user needs, ask ONE clarifying question
+5. Keep responses concise (2-3 sentences per recommendation)"""
+
+TURN_PROMPT = """{context}
+
+Based on the user's query, recommend the most relevant products from the list above.
+
+User: {query}"""
+
+# The rules open every conversation as a fixed exchange instead of being
+# pasted into each user message; only the product list changes per turn
+SYSTEM_TURNS = [
+    {"role": "user", "parts": [SYSTEM_PROMPT]},
+    {"role": "model", "parts": ["Understood."]},
+]
+SYSTEM_TOKENS = estimate_tokens(SYSTEM_PROMPT + "Understood.")
+
+context_builder = ContextBuilder(
+    budget_tokens=settings.context_token_budget,
+    max_products=settings.context_max_products,
+    description_chars=settings.context_description_chars,
+    features_chars=settings.context_features_chars,
+)
+
+CLARIFICATION_PHRASES = [
+    "could you", "what type", "can you specify", "would you like",
+    "do you prefer", "what is your", "tell me more", "?"
+]
+
+response_cache = ResponseCache(
+    max_entries=settings.response_cache_max_entries,
+    ttl_seconds=settings.response_cache_ttl_seconds,
+    similarity_threshold=settings.response_cache_similarity_threshold
+)
+
+HAIR_KEYWORDS = {
+    'dry': ['dry', 'moisture', 'hydrat', 'nourish', 'oil'],
+    'scalp': ['scalp', 'oil', 'health', 'sooth'],
+    'hair fall': ['fall', 'loss', 'minoxidil', 'growth', 'serum'],
+    'hairfall': ['fall', 'loss', 'minoxidil', 'growth', 'serum'],
+    'dandruff': ['dandruff', 'flak', 'itch', 'anti-dandruff'],
+    'density': ['density', 'thick', 'volume', 'growth', 'biotin'],
+    'thin': ['thin', 'volume', 'density', 'thick'],
+    'oily': ['oily', 'oil control', 'shampoo'],
+    'frizz': ['frizz', 'smooth', 'serum', 'conditioner'],
+    'growth': ['growth', 'minoxidil', 'serum', 'biotin'],
+}
+
 
 class RAGService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         genai.configure(api_key=settings.gemini_api_key)
         self.model = genai.GenerativeModel(settings.chat_model)
+        self.embedding_service = EmbeddingService()
+        self.last_retrieval_stats: Optional[dict] = None
+        self.last_query_embedding: Optional[List[float]] = None
+        self.last_cache_hit: Optional[str] = None
+        self.last_prompt_stats: Optional[dict] = None
+        self.last_history_key = ""
+        self.last_retrieval_reused = False
     
-    def retrieve_by_text_search(self, query: str, top_k: int = 5) -> List[Product]:
-        """Retrieve products using improved text search"""
+    def expand_keywords(self, query: str) -> Set[str]:
         query_lower = query.lower()
-        
-        keywords = [w for w in query_lower.split() if len(w) > 2]
-        
-        hair_keywords = {
-            'dry': ['dry', 'moisture', 'hydrat', 'nourish', 'oil'],
-            'scalp': ['scalp', 'oil', 'health', 'sooth'],
-            'hair fall': ['fall', 'loss', 'minoxidil', 'growth', 'serum'],
-            'hairfall': ['fall', 'loss', 'minoxidil', 'growth', 'serum'],
-            'dandruff': ['dandruff', 'flak', 'itch', 'anti-dandruff'],
-            'density': ['density', 'thick', 'volume', 'growth', 'biotin'],
-            'thin': ['thin', 'volume', 'density', 'thick'],
-            'oily': ['oily', 'oil control', 'shampoo'],
-            'frizz': ['frizz', 'smooth', 'serum', 'conditioner'],
-            'growth': ['growth', 'minoxidil', 'serum', 'biotin'],
-        }
-        
-        expanded_keywords = set(keywords)
-        for key, expansions in hair_keywords.items():
+        expanded_keywords = {w for w in query_lower.split() if len(w) > 2}
+        for key, expansions in HAIR_KEYWORDS.items():
             if key in query_lower:
                 expanded_keywords.update(expansions)
+        return expanded_keywords
+
+    async def text_search_hits(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """Keyword-scored (product_id, score) pairs, without catalog padding"""
+        return self._score_keywords(await self._search_index(), query, top_k)
+
+    def _score_keywords(self, index: ProductSearchIndex, query: str, top_k: int) -> List[Tuple[int, float]]:
+        keywords = self.expand_keywords(query)
+        with span("keyword"):
+            if settings.text_search_mode == "compat":
+                return index.search_compat(keywords, top_k)
+            return index.search(keywords, top_k)
+
+    async def _search_index(self) -> ProductSearchIndex:
+        return await get_search_index(self.db, settings.search_index_max_age_seconds)
+
+    async def embed_query(self, query: str) -> Optional[List[float]]:
+        # encode() is CPU-bound, so keep it off the event loop, batched with
+        # other in-flight queries when enabled; the result is kept for the
+        # response cache's similarity lookup
+        with span("embed"):
+            if settings.query_embed_max_wait_ms > 0:
+                self.last_query_embedding = await query_embedder.embed(query)
+            else:
+                self.last_query_embedding = await asyncio.to_thread(
+                    self.embedding_service.generate_query_embedding, query
+                )
+        return self.last_query_embedding
+
+    async def retrieve_by_text_search(self, query: str, top_k: int = 5) -> List[Row]:
+        """Retrieve products using the in-memory keyword index"""
+        product_ids = [product_id for product_id, _ in await self.text_search_hits(query, top_k)]
+        return await self.get_products_by_ids(await self.pad_ids(product_ids, top_k))
+
+    async def retrieve_by_vector_search(self, query: str, top_k: int = 5) -> List[Row]:
+        """Retrieve products by cosine distance over the pgvector ANN index.
+
+        Products without an embedding can't appear in the vector results, so
+        any remaining slots are filled from keyword hits rather than dropping
+        the whole request back to text search.
+        """
+        query_embedding = await self.embed_query(query)
+        if query_embedding is None:
+            return await self.retrieve_by_text_search(query, top_k)
         
-        products = self.db.query(Product).all()
-        scored_products = []
-        
-        for product in products:
-            score = 0
-            title_lower = product.title.lower()
-            desc_lower = (product.description or '').lower()
-            features_lower = (product.features or '').lower()
-            tags_text = ' '.join(product.tags or []).lower()
-            
-            all_text = f"{title_lower} {desc_lower} {features_lower} {tags_text}"
-            
-            for keyword in expanded_keywords:
-                if keyword in title_lower:
-                    score += 10
-                if keyword in desc_lower:
-                    score += 3
-                if keyword in features_lower:
-                    score += 2
-                if keyword in tags_text:
-                    score += 2
-            
-            if score > 0:
-                scored_products.append((score, product))
-        
-        scored_products.sort(key=lambda x: x[0], reverse=True)
-        
-        if len(scored_products) < top_k:
-            existing_ids = {p.id for _, p in scored_products}
-            for product in products:
-                if product.id not in existing_ids:
-                    scored_products.append((0, product))
-                if len(scored_products) >= top_k:
-                    break
+        product_ids = [
+            product_id for product_id, _ in await VectorSearch(self.db).search(query_embedding, top_k)
+        ]
+        if len(product_ids) < top_k:
+            seen = set(product_ids)
+            for product_id, _ in await self.text_search_hits(query, top_k):
+                if product_id not in seen and len(product_ids) < top_k:
+                    product_ids.append(product_id)
+                    seen.add(product_id)
         
-        return [p for _, p in scored_products[:top_k]]
-    
-    def retrieve_relevant_products(self, query: str, top_k: int = 5) -> List[Product]:
-        return self.retrieve_by_text_search(query, top_k)
+        return await self.get_products_by_ids(await self.pad_ids(product_ids, top_k))
+
+    async def retrieve_hybrid(self, query: str, top_k: int = 5) -> List[Row]:
+        """Fuse keyword and vector candidates, running both legs concurrently.
 
-    def build_context(self, products: List[Product]) -> str:
-        if not products:
-            return "No products found."
+        Each leg has its own timeout, so a slow embedding call only costs the
+        vector leg's budget; whatever finished in time is fused and the
+        per-leg timings are kept on ``last_retrieval_stats``.
+        """
+        candidates = max(top_k, settings.hybrid_candidates)
+        index = await self._search_index()
         
-        context_parts = ["Available products:\n"]
+        async def lexical_leg():
+            return await asyncio.to_thread(self._score_keywords, index, query, candidates)
         
-        for i, product in enumerate(products, 1):
-            context_parts.append(f"""
-Product {i}: {product.title}
-- Price: ₹{product.price}
-- Category: {product.category or 'Hair Care'}
-- Description: {(product.description or '')[:250]}
-- Key Benefits: {(product.features or '')[:150]}
-""")
+        async def vector_leg():
+            query_embedding = await self.embed_query(query)
+            if query_embedding is None:
+                raise RuntimeError("embedding model unavailable")
+            # Own session: a cancelled leg must not leave self.db mid-query
+            async with AsyncSessionLocal() as db:
+                hits = await VectorSearch(db).search(query_embedding, candidates)
+            return [(product_id, 1.0 - distance) for product_id, distance in hits]
         
-        return "\n".join(context_parts)
-
-    def generate_response(
-        self, 
-        query: str, 
-        conversation_history: List[dict] = None
-    ) -> Tuple[str, List[Product], bool]:
+        started = time.perf_counter()
+        legs = await run_legs({
+            "lexical": (lexical_leg, settings.hybrid_lexical_timeout_ms),
+            "vector": (vector_leg, settings.hybrid_vector_timeout_ms),
+        })
+        rankings = {name: leg.hits for name, leg in legs.items()}
+        weights = {
+            "lexical": 1.0 - settings.hybrid_vector_weight,
+            "vector": settings.hybrid_vector_weight,
+        }
+        if settings.hybrid_fusion == "weighted":
+            fused = weighted_score_fusion(rankings, weights)
+        else:
+            fused = reciprocal_rank_fusion(rankings, weights, settings.hybrid_rrf_k)
         
-        relevant_products = self.retrieve_relevant_products(query, top_k=5)
-        context = self.build_context(relevant_products)
+        self.last_retrieval_stats = {
+            "total_ms": round((time.perf_counter() - started) * 1000, 2),
+            "overlap": overlap(legs["lexical"].hits[:top_k], legs["vector"].hits[:top_k]),
+            **{
+                name: {
+                    "ms": round(leg.elapsed_ms, 2),
+                    "hits": len(leg.hits),
+                    "timed_out": leg.timed_out,
+                    "error": leg.error,
+                }
+                for name, leg in legs.items()
+            },
+        }
+        if top_k:
+            HYBRID_OVERLAP.observe(self.last_retrieval_stats["overlap"] / top_k)
+        for name, leg in legs.items():
+            HYBRID_LEG_DURATION.observe(leg.elapsed_ms / 1000, name)
+            if leg.timed_out or leg.error:
+                key = (name, "timeout" if leg.timed_out else "error")
+                hybrid_leg_failures[key] = hybrid_leg_failures.get(key, 0) + 1
         
-        system_prompt = """You are Mane's shopping assistant for hair care products.
+        product_ids = [product_id for product_id, _ in fused[:top_k]]
+        return await self.get_products_by_ids(await self.pad_ids(product_ids, top_k))
 
-IMPORTANT RULES:
-1. ONLY recommend products from the list below - do not mention products not in the list
-2. When recommending, use the EXACT product names from the list
-3. Be helpful and explain why each product helps with the user's concern
-4. If unsure what the user needs, ask ONE clarifying question
-5. Keep responses concise (2-3 sentences per recommendation)
+    async def pad_ids(self, product_ids: List[int], top_k: int) -> List[int]:
+        """Top up a short result list with catalog products, as the original search did"""
+        if len(product_ids) >= top_k:
+            return product_ids[:top_k]
+        index = await self._search_index()
+        return product_ids + index.fill_ids(top_k - len(product_ids), exclude=set(product_ids))
+
+    async def get_products_by_ids(self, product_ids: List[int]) -> List[Row]:
+        if not product_ids:
+            return []
+        products = (await self.db.execute(
+            select(*RESPONSE_COLUMNS, Product.content_hash).where(Product.id.in_(product_ids))
+        )).all()
+        by_id = {p.id: p for p in products}
+        return [by_id[pid] for pid in product_ids if pid in by_id]
+    
+    async def retrieve_relevant_products(self, query: str, top_k: int = 5) -> List[Row]:
+        if settings.retrieval_mode == "hybrid":
+            return await self.retrieve_hybrid(query, top_k)
+        if settings.retrieval_mode == "vector":
+            return await self.retrieve_by_vector_search(query, top_k)
+        return await self.retrieve_by_text_search(query, top_k)
 
-{context}
+    def build_context(self, products: List[Row]) -> str:
+        return context_builder.build(products)[0]
 
-Based on the user's query, recommend the most relevant products from the list above."""
+    def history_turns(self, conversation_history: Optional[List[dict]]) -> List[dict]:
+        """Last 4 messages as Gemini turns, starting on a user turn after SYSTEM_TURNS"""
+        turns = [
+            {"role": "user" if msg.get("role") == "user" else "model", "parts": [msg.get("content", "")]}
+            for msg in (conversation_history or [])[-4:]
+        ]
+        while turns and turns[0]["role"] == "model":
+            turns.pop(0)
+        return turns
 
-        messages = []
-        if conversation_history:
-            for msg in conversation_history[-4:]:
-                role = "user" if msg.get("role") == "user" else "model"
-                messages.append({"role": role, "parts": [msg.get("content", "")]})
-        
-        chat = self.model.start_chat(history=messages if messages else [])
+    async def prepare_chat(
+        self,
+        query: str,
+        conversation_history: List[dict] = None,
+        session: Optional[ChatSession] = None
+    ):
+        """Retrieve products and build the Gemini contents for a turn.
+
+        Returns only the products that made it into the context budget, so
+        the UI shows exactly what the model was told about. With a session,
+        its stored history and summary replace ``conversation_history`` and
+        a follow-up about the products already shown skips retrieval.
+        """
+        summary = ""
+        if session is not None:
+            conversation_history = session.history()
+            summary = session.summary
+        self.last_retrieval_reused = bool(session) and chat_sessions.is_follow_up(session, query, HAIR_KEYWORDS)
+        with span("retrieval"):
+            if self.last_retrieval_reused:
+                retrieved = await self.get_products_by_ids(session.product_ids)
+            else:
+                retrieved = await self.retrieve_relevant_products(query, top_k=settings.context_max_products)
+        with span("context"):
+            context, relevant_products, context_stats = context_builder.build(retrieved)
+
+        history = self.history_turns(conversation_history)
+        if summary:
+            history = [
+                {"role": "user", "parts": [f"Earlier in this conversation I asked about: {summary}"]},
+                {"role": "model", "parts": ["Noted."]},
+                *history,
+            ]
+        turn = TURN_PROMPT.format(context=context, query=query)
+        contents = [*SYSTEM_TURNS, *history, {"role": "user", "parts": [turn]}]
+        self.last_history_key = history_digest(
+            [{"role": t["role"], "content": t["parts"][0]} for t in history]
+        )
+
+        history_tokens = sum(estimate_tokens(t["parts"][0]) for t in history)
+        turn_tokens = estimate_tokens(turn)
+        self.last_prompt_stats = {
+            "prompt_tokens": SYSTEM_TOKENS + history_tokens + turn_tokens,
+            "system_tokens": SYSTEM_TOKENS,
+            "history_tokens": history_tokens,
+            "turn_tokens": turn_tokens,
+            "retrieval_reused": self.last_retrieval_reused,
+            **context_stats,
+        }
+        for part in ("prompt", "system", "history", "turn"):
+            PROMPT_TOKENS.observe(self.last_prompt_stats[f"{part}_tokens"], part)
+        return relevant_products, contents
+
+    def needs_clarification(self, response_text: str) -> bool:
+        return any(phrase in response_text.lower() for phrase in CLARIFICATION_PHRASES)
+
+    async def cached_response(self, query: str, products: List[Row]):
+        """Look up a cached answer for this query and the prompt built by prepare_chat"""
+        if not settings.response_cache_enabled:
+            return None, None
+        context_key = ResponseCache.context_key(products, PROMPT_VERSION, self.last_history_key)
+        if self.last_query_embedding is None and settings.response_cache_similarity_threshold > 0:
+            await self.embed_query(query)
+        entry, kind = response_cache.get(query, context_key, self.last_query_embedding)
+        self.last_cache_hit = kind
+        return entry, context_key
+
+    def store_response(self, query: str, context_key, response_text: str) -> None:
+        if settings.response_cache_enabled and response_text:
+            response_cache.put(
+                query, context_key, response_text,
+                self.needs_clarification(response_text), self.last_query_embedding
+            )
+
+    def finish_turn(self, session: Optional[ChatSession], query: str, response_text: str,
+                    products: List[Row]) -> None:
+        if session is not None and response_text:
+            chat_sessions.record_turn(session, query, response_text, [p.id for p in products])
+
+    async def generate_response(
+        self, 
+        query: str, 
+        conversation_history: List[dict] = None,
+        session: Optional[ChatSession] = None
+    ) -> Tuple[str, List[Row], bool]:
+        relevant_products, contents = await self.prepare_chat(query, conversation_history, session)
+        cached, context_key = await self.cached_response(query, relevant_products)
+        if cached:
+            self.finish_turn(session, query, cached.message, relevant_products)
+            return cached.message, relevant_products, cached.needs_clarification
         
-        full_prompt = f"{system_prompt.format(context=context)}\n\nUser: {query}"
-        response = chat.send_message(full_prompt)
+        with span("llm"):
+            response = await self.model.generate_content_async(contents)
+        self.store_response(query, context_key, response.text)
+        self.finish_turn(session, query, response.text, relevant_products)
+        return response.text, relevant_products, self.needs_clarification(response.text)
+
+    async def stream_response(
+        self,
+        query: str,
+        conversation_history: List[dict] = None,
+        session: Optional[ChatSession] = None
+    ) -> AsyncIterator[Tuple[str, object]]:
+        """Yield ("products", products), then ("token", text) chunks, then ("done", full_text)"""
+        relevant_products, contents = await self.prepare_chat(query, conversation_history, session)
+        yield "products", relevant_products
         
-        needs_clarification = any(phrase in response.text.lower() for phrase in [
-            "could you", "what type", "can you specify", "would you like",
-            "do you prefer", "what is your", "tell me more", "?"
-        ])
+        cached, context_key = await self.cached_response(query, relevant_products)
+        if cached:
+            self.finish_turn(session, query, cached.message, relevant_products)
+            yield "token", cached.message
+            yield "done", cached.message
+            return
         
-        return response.text, relevant_products, needs_clarification
+        parts = []
+        started = time.perf_counter()
+        with span("llm_first_token"):
+            response = await self.model.generate_content_async(contents, stream=True)
+            chunks = response.__aiter__()
+            first = await anext(chunks, None)
+        if first is not None and first.text:
+            parts.append(first.text)
+            yield "token", first.text
+        async for chunk in chunks:
+            text = chunk.text
+            if text:
+                parts.append(text)
+                yield "token", text
+        record("llm", time.perf_counter() - started)
+        full_text = "".join(parts)
+        self.store_response(query, context_key, full_text)
+        self.finish_turn(session, query, full_text, relevant_products)
+        yield "done", full_text
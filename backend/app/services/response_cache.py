@@ -0,0 +1,159 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import numpy as np
+
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    return _SPACE_RE.sub(" ", _NON_WORD_RE.sub(" ", query.lower())).strip()
+
+
+def history_digest(conversation_history: Optional[List[dict]]) -> str:
+    if not conversation_history:
+        return ""
+    payload = json.dumps(
+        [(m.get("role"), m.get("content")) for m in conversation_history], ensure_ascii=False
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class CachedResponse:
+    __slots__ = ("message", "needs_clarification", "expires_at", "embedding", "context_key")
+
+    def __init__(self, message: str, needs_clarification: bool, expires_at: float,
+                 embedding: Optional[np.ndarray], context_key: Tuple):
+        self.message = message
+        self.needs_clarification = needs_clarification
+        self.expires_at = expires_at
+        self.embedding = embedding
+        self.context_key = context_key
+
+
+class ResponseCache:
+    """TTL + LRU cache of chat answers.
+
+    The context key holds the retrieved products (id and content hash), the
+    prompt version and the conversation history digest, so an answer is
+    only reused for an identical prompt context. Within one context a query
+    hits either by exact normalized text or, when a query embedding is
+    available, by cosine similarity above ``similarity_threshold``.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, similarity_threshold: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self._by_context: Dict[Tuple, Set[Tuple]] = {}
+        self._lock = threading.Lock()
+        self.hits_exact = 0
+        self.hits_semantic = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def context_key(products: Sequence, prompt_version: str, history: str) -> Tuple:
+        return (
+            tuple((p.id, getattr(p, "content_hash", None)) for p in products),
+            prompt_version,
+            history,
+        )
+
+    def get(self, query: str, context_key: Tuple, embedding: Optional[List[float]] = None
+            ) -> Tuple[Optional[CachedResponse], Optional[str]]:
+        """Return ``(entry, "exact" | "semantic")`` or ``(None, None)`` on a miss"""
+        key = (normalize_query(query), context_key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._alive(key, entry, now):
+                self._entries.move_to_end(key)
+                self.hits_exact += 1
+                return entry, "exact"
+
+            if embedding is not None and self.similarity_threshold > 0:
+                query_vector = self._normalize(embedding)
+                best_key, best_score = None, self.similarity_threshold
+                for candidate_key in list(self._by_context.get(context_key, ())):
+                    candidate = self._entries[candidate_key]
+                    if candidate.embedding is None or not self._alive(candidate_key, candidate, now):
+                        continue
+                    score = float(np.dot(query_vector, candidate.embedding))
+                    if score >= best_score:
+                        best_key, best_score = candidate_key, score
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self.hits_semantic += 1
+                    return self._entries[best_key], "semantic"
+
+            self.misses += 1
+            return None, None
+
+    def put(self, query: str, context_key: Tuple, message: str, needs_clarification: bool,
+            embedding: Optional[List[float]] = None) -> None:
+        key = (normalize_query(query), context_key)
+        entry = CachedResponse(
+            message=message,
+            needs_clarification=needs_clarification,
+            expires_at=time.monotonic() + self.ttl_seconds,
+            embedding=self._normalize(embedding) if embedding is not None else None,
+            context_key=context_key,
+        )
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = entry
+            self._by_context.setdefault(context_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_context.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits_exact + self.hits_semantic + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits_exact": self.hits_exact,
+            "hits_semantic": self.hits_semantic,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.hits_exact + self.hits_semantic) / lookups, 4) if lookups else 0.0,
+        }
+
+    def _alive(self, key: Tuple, entry: CachedResponse, now: float) -> bool:
+        if entry.expires_at > now:
+            return True
+        self._discard(key)
+        self.expirations += 1
+        return False
+
+    def _discard(self, key: Tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_context.get(entry.context_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_context[entry.context_key]
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
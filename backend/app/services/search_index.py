@@ -0,0 +1,241 @@
+import asyncio
+import bisect
+import heapq
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.product import Product
+from app.services.index_refresh import IndexRefresher
+
+TITLE = 1
+DESCRIPTION = 2
+FEATURES = 4
+TAGS = 8
+
+# Same per-field weights the original substring scorer used (10/3/2/2)
+FIELD_WEIGHTS = {TITLE: 10, DESCRIPTION: 3, FEATURES: 2, TAGS: 2}
+_MASK_WEIGHTS = [
+    sum(weight for field, weight in FIELD_WEIGHTS.items() if mask & field)
+    for mask in range(16)
+]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+INDEX_QUERY = select(
+    Product.id, Product.title, Product.description, Product.features, Product.tags
+).order_by(Product.id)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _IndexedDoc:
+    __slots__ = ("title", "description", "features", "tags", "terms")
+
+    def __init__(self, title: str, description: str, features: str, tags: str, terms: Set[str]):
+        self.title = title
+        self.description = description
+        self.features = features
+        self.tags = tags
+        self.terms = terms
+
+
+class ProductSearchIndex:
+    """In-memory inverted index over product text fields.
+
+    Postings map each term to ``{product_id: field_mask}`` so a keyword lookup
+    touches only the products that contain it. The lowercased field text is
+    kept alongside for the ``compat`` scorer, which reproduces the original
+    substring ranking without re-reading the catalog from Postgres.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._terms: List[str] = []
+        self._docs: Dict[int, _IndexedDoc] = {}
+        self._ids: List[int] = []
+        self.built_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @property
+    def is_built(self) -> bool:
+        return self.built_at is not None
+
+    def rebuild(self, db: Session) -> int:
+        rows = db.execute(INDEX_QUERY).all()
+        self.build(rows)
+        return len(rows)
+
+    async def rebuild_async(self, db: AsyncSession) -> int:
+        rows = (await db.execute(INDEX_QUERY)).all()
+        # Tokenizing the catalog is CPU-bound; keep it off the event loop
+        await asyncio.to_thread(self.build, rows)
+        return len(rows)
+
+    def build(self, products: Iterable) -> None:
+        postings: Dict[str, Dict[int, int]] = {}
+        docs: Dict[int, _IndexedDoc] = {}
+        for product in products:
+            doc = self._make_doc(product)
+            docs[product.id] = doc
+            self._add_postings(postings, product.id, doc)
+
+        with self._lock:
+            self._postings = postings
+            self._terms = sorted(postings)
+            self._docs = docs
+            self._ids = sorted(docs)
+            self.built_at = time.monotonic()
+
+    def upsert(self, product) -> None:
+        doc = self._make_doc(product)
+        with self._lock:
+            self._remove_postings(product.id)
+            self._add_postings(self._postings, product.id, doc)
+            for term in doc.terms:
+                # A posting holding only this product is a term the vocabulary lacks
+                if len(self._postings[term]) == 1:
+                    bisect.insort(self._terms, term)
+            if product.id not in self._docs:
+                bisect.insort(self._ids, product.id)
+            self._docs[product.id] = doc
+
+    def remove(self, product_id: int) -> None:
+        with self._lock:
+            if product_id not in self._docs:
+                return
+            self._remove_postings(product_id)
+            del self._docs[product_id]
+            self._ids.pop(bisect.bisect_left(self._ids, product_id))
+
+    def search(self, keywords: Iterable[str], top_k: int) -> List[Tuple[int, int]]:
+        """Score products for the given keywords using the postings lists.
+
+        A keyword matches a field when every one of its tokens is a prefix of
+        some term in that field, so ``hydrat`` still hits ``hydrating``.
+        Returns ``(product_id, score)`` pairs for products with a score > 0.
+        """
+        scores: Dict[int, int] = {}
+        with self._lock:
+            for keyword in keywords:
+                for product_id, mask in self._match_keyword(keyword).items():
+                    scores[product_id] = scores.get(product_id, 0) + _MASK_WEIGHTS[mask]
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+    def search_compat(self, keywords: Iterable[str], top_k: int) -> List[Tuple[int, int]]:
+        """Original substring scoring, run over the cached lowercased fields."""
+        keywords = list(keywords)
+        scored = []
+        with self._lock:
+            for product_id in self._ids:
+                doc = self._docs[product_id]
+                score = 0
+                for keyword in keywords:
+                    if keyword in doc.title:
+                        score += FIELD_WEIGHTS[TITLE]
+                    if keyword in doc.description:
+                        score += FIELD_WEIGHTS[DESCRIPTION]
+                    if keyword in doc.features:
+                        score += FIELD_WEIGHTS[FEATURES]
+                    if keyword in doc.tags:
+                        score += FIELD_WEIGHTS[TAGS]
+                if score > 0:
+                    scored.append((product_id, score))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:top_k]
+
+    def fill_ids(self, count: int, exclude: Set[int]) -> List[int]:
+        """First ``count`` catalog ids not in ``exclude``, in catalog order."""
+        filled = []
+        with self._lock:
+            for product_id in self._ids:
+                if len(filled) >= count:
+                    break
+                if product_id not in exclude:
+                    filled.append(product_id)
+        return filled
+
+    def _match_keyword(self, keyword: str) -> Dict[int, int]:
+        matched: Optional[Dict[int, int]] = None
+        for token in tokenize(keyword):
+            token_masks: Dict[int, int] = {}
+            for term in self._prefix_terms(token):
+                for product_id, mask in self._postings[term].items():
+                    token_masks[product_id] = token_masks.get(product_id, 0) | mask
+            if matched is None:
+                matched = token_masks
+            else:
+                matched = {
+                    product_id: matched[product_id] & mask
+                    for product_id, mask in token_masks.items()
+                    if product_id in matched and matched[product_id] & mask
+                }
+            if not matched:
+                return {}
+        return matched or {}
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        terms = []
+        position = bisect.bisect_left(self._terms, prefix)
+        while position < len(self._terms) and self._terms[position].startswith(prefix):
+            terms.append(self._terms[position])
+            position += 1
+        return terms
+
+    def _remove_postings(self, product_id: int) -> None:
+        doc = self._docs.get(product_id)
+        if doc is None:
+            return
+        for term in doc.terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(product_id, None)
+            if not posting:
+                del self._postings[term]
+                self._terms.pop(bisect.bisect_left(self._terms, term))
+
+    @staticmethod
+    def _make_doc(product) -> _IndexedDoc:
+        return _IndexedDoc(
+            title=(product.title or "").lower(),
+            description=(product.description or "").lower(),
+            features=(product.features or "").lower(),
+            tags=" ".join(product.tags or []).lower(),
+            terms=set(),
+        )
+
+    @staticmethod
+    def _add_postings(postings: Dict[str, Dict[int, int]], product_id: int, doc: _IndexedDoc) -> None:
+        for field, text in (
+            (TITLE, doc.title),
+            (DESCRIPTION, doc.description),
+            (FEATURES, doc.features),
+            (TAGS, doc.tags),
+        ):
+            for term in tokenize(text):
+                posting = postings.setdefault(term, {})
+                posting[product_id] = posting.get(product_id, 0) | field
+                doc.terms.add(term)
+
+
+search_index = ProductSearchIndex()
+_refresher = IndexRefresher(search_index, "search index")
+
+
+async def get_search_index(db: AsyncSession, max_age_seconds: int = 0) -> ProductSearchIndex:
+    """Return the shared index, building it if empty.
+
+    Writes made through this process update the index directly; once it is
+    older than max_age_seconds (another worker may have written to the
+    catalog) it is refreshed in the background while the old one is served.
+    """
+    return await _refresher.ensure(db, max_age_seconds)
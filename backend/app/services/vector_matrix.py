@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.models.product import Product
+from app.services.index_refresh import IndexRefresher
+
+settings = get_settings()
+
+DIMENSIONS = 384
+# float16 rows are upcast in blocks of this many rows for the matmul
+_BLOCK_ROWS = 8192
+
+MATRIX_QUERY = select(Product.id, Product.embedding).where(Product.embedding.isnot(None)).order_by(Product.id)
+
+
+class VectorMatrix:
+    """All product embeddings as one contiguous, L2-normalised NumPy matrix.
+
+    Row ``i`` holds the vector of ``ids[i]``. Cosine search is a single
+    matrix-vector product plus ``argpartition``. Embedding writes in this
+    process update rows in place; the buffer grows by doubling and removals
+    swap the last row into the hole, so updates never rebuild the matrix.
+    """
+
+    def __init__(self, dtype: str = "float32"):
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.RLock()
+        self._matrix = np.empty((0, DIMENSIONS), dtype=self.dtype)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._rows: Dict[int, int] = {}
+        self._size = 0
+        self.built_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return self._matrix.nbytes + self._ids.nbytes
+
+    def rebuild(self, db: Session) -> int:
+        rows = db.execute(MATRIX_QUERY).all()
+        self.build(rows)
+        return len(rows)
+
+    async def rebuild_async(self, db: AsyncSession) -> int:
+        rows = (await db.execute(MATRIX_QUERY)).all()
+        # Normalising every row is CPU-bound; keep it off the event loop
+        await asyncio.to_thread(self.build, rows)
+        return len(rows)
+
+    def build(self, rows: Iterable[Tuple[int, Sequence[float]]]) -> None:
+        rows = list(rows)
+        matrix = np.empty((len(rows), DIMENSIONS), dtype=self.dtype)
+        ids = np.empty(len(rows), dtype=np.int64)
+        for i, (product_id, embedding) in enumerate(rows):
+            ids[i] = product_id
+            matrix[i] = self._normalize(embedding)
+        with self._lock:
+            self._matrix = matrix
+            self._ids = ids
+            self._rows = {int(product_id): i for i, product_id in enumerate(ids)}
+            self._size = len(rows)
+            self.built_at = time.monotonic()
+
+    def upsert(self, product_id: int, embedding: Optional[Sequence[float]]) -> None:
+        if embedding is None:
+            self.remove(product_id)
+            return
+        vector = self._normalize(embedding)
+        with self._lock:
+            row = self._rows.get(product_id)
+            if row is None:
+                if self._size == len(self._matrix):
+                    self._grow()
+                row = self._size
+                self._size += 1
+                self._rows[product_id] = row
+                self._ids[row] = product_id
+            self._matrix[row] = vector
+
+    def remove(self, product_id: int) -> None:
+        with self._lock:
+            row = self._rows.pop(product_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                moved_id = int(self._ids[last])
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._size = last
+
+    def search(self, query_embedding: Sequence[float], top_k: int) -> List[Tuple[int, float]]:
+        """Return (product_id, cosine_distance) for the ``top_k`` nearest rows"""
+        query = self._normalize(query_embedding).astype(np.float32)
+        with self._lock:
+            size = self._size
+            if size == 0 or top_k <= 0:
+                return []
+            if self.dtype == np.float32:
+                scores = self._matrix[:size] @ query
+            else:
+                scores = np.empty(size, dtype=np.float32)
+                for start in range(0, size, _BLOCK_ROWS):
+                    block = self._matrix[start:min(start + _BLOCK_ROWS, size)]
+                    scores[start:start + len(block)] = block.astype(np.float32) @ query
+            ids = self._ids[:size].copy()
+
+        if top_k < size:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            top = np.arange(size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[i]), float(1.0 - scores[i])) for i in top]
+
+    def _grow(self) -> None:
+        capacity = max(64, len(self._matrix) * 2)
+        matrix = np.empty((capacity, DIMENSIONS), dtype=self.dtype)
+        matrix[:self._size] = self._matrix[:self._size]
+        ids = np.empty(capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        self._matrix, self._ids = matrix, ids
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+vector_matrix = VectorMatrix(settings.vector_matrix_dtype)
+_refresher = IndexRefresher(vector_matrix, "vector matrix")
+
+
+def vector_matrix_enabled() -> bool:
+    return settings.vector_search_backend == "numpy"
+
+
+async def get_vector_matrix(db: AsyncSession, max_age_seconds: int = 0) -> VectorMatrix:
+    """Return the shared matrix, loading it if empty and refreshing it in the background once older than max_age_seconds"""
+    return await _refresher.ensure(db, max_age_seconds)
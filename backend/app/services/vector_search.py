@@ -0,0 +1,42 @@
+import asyncio
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Tuple
+from app.core.config import get_settings
+from app.models.product import Product
+from app.services.vector_matrix import get_vector_matrix, vector_matrix_enabled
+
+settings = get_settings()
+
+
+class VectorSearch:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def apply_search_params(self) -> None:
+        """Set per-transaction ANN recall/speed knobs for the configured index"""
+        if settings.vector_index_type == "hnsw":
+            await self.db.execute(
+                text("SELECT set_config('hnsw.ef_search', :value, true)"),
+                {"value": str(settings.hnsw_ef_search)}
+            )
+        elif settings.vector_index_type == "ivfflat":
+            await self.db.execute(
+                text("SELECT set_config('ivfflat.probes', :value, true)"),
+                {"value": str(settings.ivfflat_probes)}
+            )
+
+    async def search(self, query_embedding: List[float], top_k: int = 5) -> List[Tuple[int, float]]:
+        """Return (product_id, cosine_distance) for the nearest embedded products"""
+        if vector_matrix_enabled():
+            matrix = await get_vector_matrix(self.db, settings.search_index_max_age_seconds)
+            return await asyncio.to_thread(matrix.search, query_embedding, top_k)
+        await self.apply_search_params()
+        distance = Product.embedding.cosine_distance(query_embedding)
+        rows = (await self.db.execute(
+            select(Product.id, distance.label("distance"))
+            .where(Product.embedding.isnot(None))
+            .order_by(distance)
+            .limit(top_k)
+        )).all()
+        return [(row.id, float(row.distance)) for row in rows]
@@ -0,0 +1,86 @@
+"""Synthetic catalogs shaped like parsing.parse_product output, plus labeled queries."""
+import random
+from typing import Any, Dict, List, Tuple
+
+# concern -> words that describe it, product types that treat it
+CONCERNS = {
+    "dandruff": (["dandruff", "flakes", "itchy scalp", "anti-dandruff", "ketoconazole"], ["Shampoo", "Scalp Serum"]),
+    "hair fall": (["hair fall", "hair loss", "minoxidil", "growth", "root strength"], ["Serum", "Tablets", "Oil"]),
+    "dry hair": (["dry", "moisture", "hydrating", "nourishing", "argan"], ["Conditioner", "Hair Mask", "Oil"]),
+    "frizz": (["frizz", "smooth", "sleek", "humidity control", "keratin"], ["Conditioner", "Serum"]),
+    "oily scalp": (["oily", "oil control", "clarifying", "sebum", "tea tree"], ["Shampoo", "Scalp Toner"]),
+    "thinning": (["thin", "density", "volume", "biotin", "thickening"], ["Tablets", "Serum", "Shampoo"]),
+}
+
+BRANDS = ["Traya", "Mane", "Kesh", "Veda", "Aura", "Roots", "Nila", "Bhringa"]
+ADJECTIVES = ["Advanced", "Daily", "Intensive", "Herbal", "Clinical", "Gentle", "Ayurvedic", "Pro"]
+BOILERPLATE = [
+    "Free from parabens and sulphates.",
+    "Dermatologically tested.",
+    "Suitable for all hair types.",
+    "Made in India.",
+]
+
+# (query, concern) pairs for precision@k: every product with the concern is relevant
+CONCERN_QUERIES = [
+    ("I have dandruff and an itchy scalp", "dandruff"),
+    ("what helps with flakes on my scalp", "dandruff"),
+    ("my hair is falling out a lot", "hair fall"),
+    ("something for hair loss and growth", "hair fall"),
+    ("my hair feels very dry and rough", "dry hair"),
+    ("need moisture for dry ends", "dry hair"),
+    ("how do I control frizz in humidity", "frizz"),
+    ("smooth sleek hair product", "frizz"),
+    ("my scalp gets oily by noon", "oily scalp"),
+    ("clarifying shampoo for sebum", "oily scalp"),
+    ("my hair is thin and lacks volume", "thinning"),
+    ("increase hair density", "thinning"),
+]
+
+
+def generate_catalog(size: int, seed: int = 7) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """Return (products, external_id -> concern) for ``size`` products"""
+    rng = random.Random(seed)
+    products, labels = [], {}
+    concerns = list(CONCERNS)
+    for i in range(size):
+        concern = concerns[i % len(concerns)]
+        words, types = CONCERNS[concern]
+        product_type = rng.choice(types)
+        brand = rng.choice(BRANDS)
+        keyword = rng.choice(words)
+        title = f"{brand} {rng.choice(ADJECTIVES)} {keyword.title()} {product_type} {i}"
+        description = " ".join([
+            f"{title} is formulated for {concern}.",
+            f"It works with {rng.choice(words)} actives and {rng.choice(words)} care.",
+            rng.choice(BOILERPLATE),
+            rng.choice(BOILERPLATE),
+        ])
+        features = f"Targets {concern}. Helps with {rng.choice(words)}."
+        price = float(rng.randrange(199, 2999, 50))
+        external_id = f"bench-{i}"
+        products.append({
+            "external_id": external_id,
+            "title": title,
+            "price": price,
+            "compare_price": price + 200 if rng.random() < 0.3 else None,
+            "description": description,
+            "features": features,
+            "image_url": f"https://cdn.example.com/{external_id}.jpg",
+            "images": [f"https://cdn.example.com/{external_id}.jpg"],
+            "category": product_type,
+            "vendor": brand,
+            "product_type": product_type,
+            "tags": [concern, product_type.lower(), keyword],
+            "url": f"https://example.com/products/{external_id}",
+        })
+        labels[external_id] = concern
+    return products, labels
+
+
+def target_queries(products: List[Dict[str, Any]], count: int = 20, seed: int = 11) -> List[Tuple[str, str]]:
+    """(query, external_id) pairs naming one product, for recall@k"""
+    rng = random.Random(seed)
+    picked = rng.sample(products, min(count, len(products)))
+    return [(f"{p['vendor']} {p['title'].split()[2]} {p['product_type']} {p['title'].split()[-1]}", p["external_id"])
+            for p in picked]
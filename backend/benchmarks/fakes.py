@@ -0,0 +1,86 @@
+"""Deterministic local stand-ins for the embedding model and Gemini, with configurable latency."""
+import asyncio
+import re
+import time
+import zlib
+from typing import Dict, List
+import numpy as np
+
+DIMENSIONS = 384
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class FakeEmbeddingBackend:
+    """Hashed bag-of-words vectors: same text, same vector; shared words, nearby vectors.
+
+    ``latency_ms`` is paid per encode call and ``per_item_ms`` per text, as a
+    rough model of a CPU forward pass.
+    """
+
+    def __init__(self, latency_ms: float = 5.0, per_item_ms: float = 0.5):
+        self.latency_ms = latency_ms
+        self.per_item_ms = per_item_ms
+        self.name = "bench-fake"
+        self._tokens: Dict[str, np.ndarray] = {}
+
+    def encode(self, texts, batch_size: int = 32):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        time.sleep((self.latency_ms + self.per_item_ms * len(batch)) / 1000)
+        vectors = np.vstack([self._embed(text) for text in batch]) if batch else np.empty((0, DIMENSIONS))
+        return vectors[0] if single else vectors
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(DIMENSIONS, dtype=np.float32)
+        for token in _TOKEN_RE.findall(text.lower()):
+            token_vector = self._tokens.get(token)
+            if token_vector is None:
+                rng = np.random.default_rng(zlib.crc32(token.encode()))
+                token_vector = self._tokens[token] = rng.standard_normal(DIMENSIONS).astype(np.float32)
+            vector += token_vector
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _StreamResponse:
+    def __init__(self, words: List[str], first_token_ms: float, per_token_ms: float):
+        self.words = words
+        self.first_token_ms = first_token_ms
+        self.per_token_ms = per_token_ms
+
+    async def __aiter__(self):
+        await asyncio.sleep(self.first_token_ms / 1000)
+        for i, word in enumerate(self.words):
+            if i:
+                await asyncio.sleep(self.per_token_ms / 1000)
+            yield _Chunk(word + " ")
+
+
+class FakeGenerativeModel:
+    """Stands in for genai.GenerativeModel: recommends the first product in the prompt"""
+
+    first_token_ms = 300.0
+    per_token_ms = 5.0
+    tokens = 60
+
+    def __init__(self, model_name: str = "fake", **kwargs):
+        self.model_name = model_name
+
+    def _answer(self, contents) -> List[str]:
+        prompt = contents[-1]["parts"][0]
+        match = re.search(r"Product 1: (.+)", prompt)
+        product = match.group(1) if match else "our catalog"
+        words = f"I recommend {product} because it targets your concern.".split()
+        return (words + ["Use", "it", "regularly."] * self.tokens)[:self.tokens]
+
+    async def generate_content_async(self, contents, stream: bool = False):
+        words = self._answer(contents)
+        if stream:
+            return _StreamResponse(words, self.first_token_ms, self.per_token_ms)
+        await asyncio.sleep((self.first_token_ms + self.per_token_ms * len(words)) / 1000)
+        return _Chunk(" ".join(words))
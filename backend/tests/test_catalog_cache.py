@@ -0,0 +1,73 @@
+"""A load that overlaps a catalog write must not be cached into the new generation"""
+from types import SimpleNamespace
+
+from app.services.catalog_cache import CatalogCache
+
+
+def product(product_id, title):
+    return SimpleNamespace(
+        id=product_id, external_id=str(product_id), title=title, price=10.0, compare_price=None,
+        description=None, features=None, image_url=None, images=None, category=None,
+        vendor=None, product_type=None, tags=None, url=None, source=None,
+    )
+
+
+def test_load_overlapping_bump_is_discarded():
+    cache = CatalogCache(ttl_seconds=0)
+
+    def stale_load():
+        cache.bump()  # a write commits while the read is in flight
+        return {"title": "old"}
+
+    body, _ = cache.get_json("facets", stale_load)
+    assert body == b'{"title":"old"}'
+    body, _ = cache.get_json("facets", lambda: {"title": "new"})
+    assert body == b'{"title":"new"}'
+
+
+def test_page_load_overlapping_bump_discards_page_and_products():
+    cache = CatalogCache(ttl_seconds=0)
+
+    def stale_load():
+        cache.bump()
+        return [product(1, "old")], {"total": 1}
+
+    cache.get_page("page", stale_load)
+    body, _ = cache.get_page("page", lambda: ([product(1, "new")], {"total": 1}))
+    assert b'"title":"new"' in body
+    body, _ = cache.get_product(1, lambda: product(1, "newer"))
+    assert b'"title":"new"' in body
+
+
+def test_memo_and_product_loads_overlapping_bump_are_discarded():
+    cache = CatalogCache(ttl_seconds=0)
+
+    def stale_count():
+        cache.bump()
+        return 1
+
+    assert cache.memo("count", stale_count) == 1
+    assert cache.memo("count", lambda: 2) == 2
+
+    def stale_product():
+        cache.bump()
+        return product(5, "old")
+
+    cache.get_product(5, stale_product)
+    body, _ = cache.get_product(5, lambda: product(5, "new"))
+    assert b'"title":"new"' in body
+
+
+def test_cached_until_bump():
+    cache = CatalogCache(ttl_seconds=0)
+    cache.get_json("key", lambda: 1)
+    assert cache.get_json("key", lambda: 2)[0] == b"1"
+    cache.bump()
+    assert cache.get_json("key", lambda: 2)[0] == b"2"
+
+
+def test_products_are_bounded():
+    cache = CatalogCache(ttl_seconds=0, max_products=3)
+    for product_id in range(5):
+        cache.get_product(product_id, lambda product_id=product_id: product(product_id, "p"))
+    assert list(cache._products) == [2, 3, 4]
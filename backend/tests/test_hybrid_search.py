@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from app.services.hybrid_search import overlap, reciprocal_rank_fusion, run_legs, weighted_score_fusion
+
+
+def ids(fused):
+    return [product_id for product_id, _ in fused]
+
+
+def test_reciprocal_rank_fusion_uses_ranks_and_weights():
+    rankings = {"lexical": [(1, 9.0), (2, 5.0)], "vector": [(2, 0.9), (3, 0.8)]}
+    fused = reciprocal_rank_fusion(rankings, {"lexical": 1.0, "vector": 1.0}, k=60)
+    assert ids(fused) == [2, 1, 3]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+
+    fused = reciprocal_rank_fusion(rankings, {"lexical": 0.0, "vector": 1.0}, k=60)
+    assert ids(fused)[:2] == [2, 3]
+
+
+def test_weighted_score_fusion_blends_normalised_scores():
+    rankings = {"lexical": [(1, 10.0), (2, 5.0), (3, 0.0)], "vector": [(3, 0.9), (2, 0.5), (1, 0.1)]}
+    fused = dict(weighted_score_fusion(rankings, {"lexical": 0.5, "vector": 0.5}))
+    assert fused[1] == pytest.approx(0.5)
+    assert fused[2] == pytest.approx(0.5 * 0.5 + 0.5 * 0.5)
+    assert fused[3] == pytest.approx(0.5)
+
+
+def test_weighted_score_fusion_keeps_order_of_negative_scores():
+    # Cosine similarities can be negative; the best hit must still rank first
+    rankings = {"vector": [(1, -0.1), (2, -0.4), (3, -0.9)]}
+    assert ids(weighted_score_fusion(rankings, {"vector": 1.0})) == [1, 2, 3]
+
+    rankings = {"vector": [(1, 0.3), (2, -0.2)]}
+    assert ids(weighted_score_fusion(rankings, {"vector": 1.0})) == [1, 2]
+
+
+def test_weighted_score_fusion_equal_and_empty_legs():
+    fused = weighted_score_fusion({"lexical": [(1, -0.5), (2, -0.5)], "vector": []}, {})
+    assert fused == [(1, 1.0), (2, 1.0)]
+
+
+def test_overlap():
+    assert overlap([(1, 0.0), (2, 0.0)], [(2, 1.0), (3, 1.0)]) == 1
+
+
+def test_run_legs_isolates_timeouts_and_errors():
+    async def fast():
+        return [(1, 1.0)]
+
+    async def slow():
+        await asyncio.sleep(1)
+        return [(2, 1.0)]
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    legs = asyncio.run(run_legs({"fast": (fast, 500), "slow": (slow, 10), "broken": (broken, 500)}))
+    assert legs["fast"].hits == [(1, 1.0)]
+    assert legs["slow"].timed_out and legs["slow"].hits == []
+    assert legs["broken"].error == "boom" and legs["broken"].hits == []
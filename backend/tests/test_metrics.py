@@ -0,0 +1,25 @@
+from app.core.metrics import MetricsRegistry
+
+
+def test_counter_and_gauge_types():
+    registry = MetricsRegistry()
+    registry.gauge("queue_depth", "Jobs waiting", lambda: 3)
+    registry.counter("shed_total", "Requests shed", lambda: {("chat",): 2}, ("route",))
+    lines = registry.render().splitlines()
+    assert "# TYPE queue_depth gauge" in lines
+    assert "queue_depth 3.0" in lines
+    assert "# TYPE shed_total counter" in lines
+    assert 'shed_total{route="chat"} 2.0' in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "a")
+    histogram.observe(0.5, "a")
+    histogram.observe(5.0, "a")
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{route="a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="a",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{route="a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="a"} 3' in lines
@@ -0,0 +1,94 @@
+"""html_to_text must match BeautifulSoup(html, "html.parser").get_text(" ", strip=True)
+followed by whitespace collapsing, which the scraper used before parsing.py.
+
+Expected outputs were produced with beautifulsoup4 4.12; when bs4 is
+installed the same cases are also checked against it directly.
+"""
+import re
+
+import pytest
+
+from app.scraper.parsing import clean_html, extract_features, html_to_text, parse_product
+
+CASES = [
+    # tags and whitespace
+    ("<p>Hello <b>world</b></p>", "Hello world"),
+    ("<p>Hi<br>there</p>", "Hi there"),
+    ("<div>\n  a\t\tb  \n</div>", "a b"),
+    ("<ul><li>one</li><li>two</li></ul>", "one two"),
+    ("a<img src='x.png'/>b", "a b"),
+    # skipped contents
+    ("a<script>var x=1;</script>b", "a b"),
+    ("a<style>p{}</style>b", "a b"),
+    ("<template>t</template>u", "u"),
+    ("x<!-- c -->y", "x y"),
+    ("<?php x ?>v", "v"),
+    ("<!DOCTYPE html>w", "w"),
+    ("<p>Hi<br>there</p><![CDATA[cd]]>q", "Hi there cd q"),
+    # entities and character references
+    ("&amp; &lt;b&gt; &nbsp;z &#150; &foo; &amp", "& <b> z – &foo &amp"),
+    ("&#x41;&#66;&eacute;", "ABé"),
+    ("5<6 and 7>3", "5<6 and 7>3"),
+    # unbalanced and stray tags
+    ("a<textarea>b<i>c</i></textarea>d", "a b c d"),
+    (
+        "</script><textarea></li></b>&#150;<br>5<6</br>&foo;<style></script>&#x41;<script><p/><textarea>",
+        "– 5<6&foo",
+    ),
+    (
+        "&amp<br>Contains Biotin</br>Helps reduce hair fall.Helps reduce hair fall."
+        "<!DOCTYPE html><template>&&#150;<?pi ?>",
+        "& Contains BiotinHelps reduce hair fall.Helps reduce hair fall.",
+    ),
+]
+
+
+@pytest.mark.parametrize("html, expected", CASES)
+def test_html_to_text(html, expected):
+    assert html_to_text(html) == expected
+
+
+@pytest.mark.parametrize("html, expected", CASES)
+def test_matches_beautiful_soup(html, expected):
+    bs4 = pytest.importorskip("bs4")
+    text = bs4.BeautifulSoup(html, "html.parser").get_text(" ", strip=True)
+    assert re.sub(r"\s+", " ", text).strip() == html_to_text(html)
+
+
+def test_clean_html_plain_text_fast_path():
+    assert clean_html("  Plain\n text  ") == "Plain text"
+    assert clean_html("") == ""
+    assert clean_html(None) == ""
+
+
+def test_extract_features():
+    description = "Contains biotin for strength. Nice. Helps reduce hair fall quickly"
+    assert extract_features(description, ["vegan", ""]) == (
+        "vegan | Contains biotin for strength | Helps reduce hair fall quickly"
+    )
+
+
+def test_parse_product():
+    product = parse_product(
+        {
+            "id": 7,
+            "title": "Hair Oil",
+            "handle": "hair-oil",
+            "body_html": "<p>Helps reduce hair fall &amp; breakage.</p>",
+            "tags": "oil, scalp",
+            "variants": [{"price": "499.00", "compare_at_price": "599.00"}],
+            "images": [{"src": "https://cdn.example.com/a.png"}],
+        },
+        "https://shop.example.com",
+        source="example",
+    )
+    assert product["external_id"] == "7"
+    assert product["price"] == 499.0
+    assert product["compare_price"] == 599.0
+    assert product["description"] == "Helps reduce hair fall & breakage."
+    assert product["features"] == "oil | scalp | Helps reduce hair fall & breakage"
+    assert product["tags"] == ["oil", "scalp"]
+    assert product["category"] == "Hair Care"
+    assert product["vendor"] == "Traya"
+    assert product["url"] == "https://shop.example.com/products/hair-oil"
+    assert product["source"] == "example"
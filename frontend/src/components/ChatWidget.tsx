@@ -1,6 +1,6 @@
 import { useState, useRef, useEffect } from 'react';
 import { ChatMessage } from '../types';
-import { sendChatMessage } from '../services/api';
+import { streamChatMessage } from '../services/api';
 import { ProductCard } from './ProductCard';
 import './ChatWidget.css';
 
@@ -9,6 +9,7 @@ export function ChatWidget() {
   const [messages, setMessages] = useState<ChatMessage[]>([]);
   const [input, setInput] = useState('');
   const [loading, setLoading] = useState(false);
+  const [sessionId, setSessionId] = useState<string | null>(null);
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
   useEffect(() => {
@@ -23,17 +24,36 @@ export function ChatWidget() {
     setInput('');
     setLoading(true);
 
+    const history = messages;
+    let reply: ChatMessage = { role: 'assistant', content: '' };
+    const showReply = (update: Partial<ChatMessage>) => {
+      reply = { ...reply, ...update };
+      setMessages([...history, userMessage, reply]);
+      setLoading(false);
+    };
+
     try {
-      const response = await sendChatMessage(input, messages);
-      const assistantMessage: ChatMessage = {
-        role: 'assistant',
-        content: response.message,
-        products: response.products,
-      };
-      setMessages(prev => [...prev, assistantMessage]);
+      let text = '';
+      const response = await streamChatMessage(
+        input,
+        history,
+        {
+          onProducts: products => {
+            reply = { ...reply, products };
+          },
+          onToken: token => {
+            text += token;
+            showReply({ content: text });
+          },
+        },
+        sessionId
+      );
+      setSessionId(response.session_id ?? null);
+      showReply({ content: response.message, products: response.products });
     } catch {
-      setMessages(prev => [
-        ...prev,
+      setMessages([
+        ...history,
+        userMessage,
         { role: 'assistant', content: 'Sorry, something went wrong. Please try again.' },
       ]);
     } finally {
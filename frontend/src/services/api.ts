@@ -23,18 +23,101 @@ export async function searchProducts(query: string): Promise<Product[]> {
   return data;
 }
 
+// The server keeps the transcript per session, so history is only sent to
+// start one. A 409 means the session expired, was evicted or was lost to a
+// restart; the request is then retried once, re-seeding a new session.
+const SEED_HISTORY_MESSAGES = 10;
+const SESSION_EXPIRED = 409;
+
+function chatPayload(message: string, conversationHistory: ChatMessage[], sessionId?: string | null) {
+  if (sessionId) {
+    return { message, session_id: sessionId };
+  }
+  return {
+    message,
+    session_id: null,
+    conversation_history: conversationHistory
+      .slice(-SEED_HISTORY_MESSAGES)
+      .map(m => ({ role: m.role, content: m.content })),
+  };
+}
+
 export async function sendChatMessage(
   message: string,
-  conversationHistory: ChatMessage[]
+  conversationHistory: ChatMessage[],
+  sessionId?: string | null
 ): Promise<ChatResponse> {
-  const { data } = await api.post('/chat', {
-    message,
-    conversation_history: conversationHistory.map(m => ({
-      role: m.role,
-      content: m.content,
-    })),
+  try {
+    const { data } = await api.post('/chat', chatPayload(message, conversationHistory, sessionId));
+    return data;
+  } catch (error) {
+    if (sessionId && axios.isAxiosError(error) && error.response?.status === SESSION_EXPIRED) {
+      return sendChatMessage(message, conversationHistory, null);
+    }
+    throw error;
+  }
+}
+
+export interface ChatStreamHandlers {
+  onProducts?: (products: Product[]) => void;
+  onToken?: (text: string) => void;
+}
+
+export async function streamChatMessage(
+  message: string,
+  conversationHistory: ChatMessage[],
+  handlers: ChatStreamHandlers = {},
+  sessionId?: string | null
+): Promise<ChatResponse> {
+  const response = await fetch(`${API_BASE}/api/chat/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(chatPayload(message, conversationHistory, sessionId)),
   });
-  return data;
+  if (sessionId && response.status === SESSION_EXPIRED) {
+    return streamChatMessage(message, conversationHistory, handlers, null);
+  }
+  if (!response.ok || !response.body) {
+    throw new Error(`Chat stream failed: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  const result: ChatResponse = { message: '', products: [], needs_clarification: false };
+  let buffer = '';
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+
+      const event = raw.match(/^event: (.*)$/m)?.[1];
+      const data = raw.match(/^data: (.*)$/m)?.[1];
+      if (!event || data === undefined) continue;
+      const payload = JSON.parse(data);
+
+      if (event === 'products') {
+        result.products = payload;
+        handlers.onProducts?.(payload);
+      } else if (event === 'token') {
+        result.message += payload.text;
+        handlers.onToken?.(payload.text);
+      } else if (event === 'done') {
+        result.message = payload.message;
+        result.needs_clarification = payload.needs_clarification;
+        result.session_id = payload.session_id;
+      } else if (event === 'error') {
+        throw new Error(payload.detail);
+      }
+    }
+  }
+  return result;
 }
 
 export async function runScraper(): Promise<{ status: string; message: string }> {
@@ -13,11 +13,13 @@ export interface Product {
   product_type?: string;
   tags?: string[];
   url?: string;
+  source?: string;
 }
 
 export interface ProductListResponse {
   products: Product[];
   total: number;
+  next_cursor?: string | null;
 }
 
 export interface ChatMessage {
@@ -30,5 +32,6 @@ export interface ChatResponse {
   message: string;
   products: Product[];
   needs_clarification: boolean;
+  session_id?: string | null;
 }
 